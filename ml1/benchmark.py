@@ -0,0 +1,144 @@
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from main import (K, N_FIELDS, Individual, Population, Problem, create_random_individual, evolve_population,
+                  single_point_crossover, two_point_crossover, uniform_crossover,
+                  random_reset, swap_mutation, inversion_mutation)
+
+CROSSOVERS = [single_point_crossover, two_point_crossover, uniform_crossover]
+MUTATIONS = [random_reset, swap_mutation, inversion_mutation]
+
+# Бенчмарк пропускной способности GA: поколения/с, оценки/с и пиковая память
+# для каждой пары операторов. Режимы: batched - пакетные операторы над матрицей
+# геномов на синтетических задачах растущего размера, scalar - поштучный путь
+# с объектами Individual (он работает только со встроенной задачей N_FIELDS x K).
+# Время меряется без tracemalloc (он замедляет цикл в разы), память - отдельным прогоном
+MODES = ("scalar", "batched")
+MEMORY_GENERATIONS = 5
+
+def bench_case(n_fields, k, pop_size, generations, crossover, mutation, seed=0, mode="batched"):
+    # реальные оценки фитнеса: потомки без скрещивания и с дельта-мутацией не пересчитываются
+    evaluated = [0]
+    if mode == "batched":
+        rng = np.random.default_rng(seed)
+        problem = Problem.random(n_fields, k, rng)
+        evaluate = problem.evaluate
+        def counting_evaluate(genomes):
+            evaluated[0] += len(genomes)
+            return evaluate(genomes)
+        problem.evaluate = counting_evaluate
+        population = Population.random(problem, pop_size, rng)
+        step = lambda population: evolve_population(population, crossover, mutation, batched=True, rng=rng)
+        best = lambda population: float(population.fitness.max())
+    elif mode == "scalar":
+        if (n_fields, k) != (N_FIELDS, K):
+            raise ValueError(f"Поштучный режим считает только встроенную задачу {N_FIELDS} x {K}")
+        random.seed(seed)
+        np.random.seed(seed)
+        calculate_fitness = Individual.calculate_fitness
+        def counting_calculate_fitness(ind):
+            evaluated[0] += 1
+            return calculate_fitness(ind)
+        Individual.calculate_fitness = counting_calculate_fitness
+        population = [create_random_individual() for _ in range(pop_size)]
+        step = lambda population: evolve_population(population, crossover, mutation)
+        best = lambda population: float(max(ind.fitness for ind in population))
+    else:
+        raise ValueError(f"Неизвестный режим: {mode}, ожидается один из {MODES}")
+    try:
+        # прогрев: первое поколение не учитывается
+        population = step(population)
+        evaluated[0] = 0
+        start = time.perf_counter()
+        for _ in range(generations):
+            population = step(population)
+        elapsed = time.perf_counter() - start
+        evaluations = evaluated[0]
+        best_fitness = best(population)
+        tracemalloc.start()
+        for _ in range(min(generations, MEMORY_GENERATIONS)):
+            population = step(population)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if mode == "scalar":
+            Individual.calculate_fitness = calculate_fitness
+    return {
+        "mode": mode, "n_fields": n_fields, "k": k, "pop_size": pop_size, "generations": generations,
+        "crossover": crossover.__name__, "mutation": mutation.__name__,
+        "seconds": elapsed,
+        "generations_per_sec": generations / elapsed,
+        "individuals_per_sec": generations * pop_size / elapsed,
+        "evaluations": evaluations,
+        "evaluations_per_sec": evaluations / elapsed,
+        "peak_memory_bytes": peak,
+        "best_fitness": best_fitness,
+    }
+
+# в отчетах до появления режимов были только пакетные прогоны
+def case_key(row):
+    return (row.get("mode", "batched"), row["n_fields"], row["k"], row["pop_size"], row["crossover"], row["mutation"])
+
+# сравнение с прошлым прогоном: регрессия - падение поколений/с больше порога
+def find_regressions(rows, baseline_rows, threshold):
+    baseline = {case_key(row): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        old = baseline.get(case_key(row))
+        if old is None:
+            continue
+        ratio = row["generations_per_sec"] / old["generations_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append({"case": case_key(row), "ratio": ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк генетического алгоритма ml1")
+    parser.add_argument("--fields", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--crops", type=int, nargs="+", default=[6])
+    parser.add_argument("--pop", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_ml1.json")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    rows = []
+    for mode in args.modes:
+        shapes = list(itertools.product(args.fields, args.crops)) if mode == "batched" else [(N_FIELDS, K)]
+        for (n_fields, k), pop_size, crossover, mutation in itertools.product(
+                shapes, args.pop, CROSSOVERS, MUTATIONS):
+            row = bench_case(n_fields, k, pop_size, args.generations, crossover, mutation, args.seed, mode)
+            rows.append(row)
+            print(f"{mode:<8}{n_fields:>6} x {k:<3} pop={pop_size:<6} {crossover.__name__:<24} {mutation.__name__:<20}"
+                  f" {row['generations_per_sec']:10.1f} пок/с {row['individuals_per_sec']:12.0f} ос/с"
+                  f" {row['evaluations_per_sec']:12.0f} оц/с"
+                  f" {row['peak_memory_bytes'] / 2**20:8.1f} МБ")
+
+    report = {
+        "python": platform.python_version(), "numpy": np.__version__,
+        "platform": platform.platform(), "timestamp": time.time(), "results": rows,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(rows, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression['case']}: {regression['ratio']:.2f}x от базового")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,22 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import random
+import bisect
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Barrier, Process, Queue, shared_memory
+
+try:
+    import profiling
+except ImportError:
+    # заглушка, см. profiling.py
+    profiling = types.SimpleNamespace(timed=lambda name: lambda fn: fn)
 
    # Количество полей
 CROPS = ["Wheat", "Corn", "Barley", "Soybean", "Sunflower", "Beet"]
@@ -24,22 +40,260 @@ ALPHA, BETA = 0.6, 0.4
 MUTATION_PROBABILITY = 0.5
 CROSSOVER_PROBABILITY = 0.7
 
+# наименьший целый тип, вмещающий номера культур
+def genome_dtype(k):
+    return np.uint8 if k <= np.iinfo(np.uint8).max + 1 else np.int16
+
+# LRU-кэш фитнеса по байтам генома, общий для всех операторов и поколений
+class FitnessCache:
+    def __init__(self, maxsize=100_000, dtype=np.int64):
+        self.maxsize = maxsize
+        self.dtype = dtype
+        self._data = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def key(self, genome):
+        return np.ascontiguousarray(genome, dtype=self.dtype).tobytes()
+
+    def get(self, key):
+        values = self._data.get(key)
+        if values is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return values
+
+    def put(self, key, values):
+        self._data[key] = values
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    # пакетная оценка: считаются только геномы, которых нет в кэше, каждый один раз
+    def evaluate(self, genomes, compute):
+        values = np.empty((len(genomes), 3))
+        pending = {}
+        for i, genome in enumerate(genomes):
+            key = self.key(genome)
+            if key in pending:
+                self.hits += 1
+                pending[key].append(i)
+                continue
+            cached = self.get(key)
+            if cached is None:
+                pending[key] = [i]
+            else:
+                values[i] = cached
+        if pending:
+            rows = [indices[0] for indices in pending.values()]
+            computed = np.stack(compute(genomes[rows]), axis=1)
+            for (key, indices), row in zip(pending.items(), computed):
+                values[indices] = row
+                self.put(key, tuple(row))
+        return values[:, 0], values[:, 1], values[:, 2]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._data), "hit_rate": self.hits / lookups if lookups else 0.0}
+
+# задача: урожайность полей, стоимость культур и нормировочные константы
+class Problem:
+    # сколько генов считать за один проход, чтобы промежуточный массив не разрастался
+    CHUNK_GENES = 1 << 22
+
+    def __init__(self, field_yields, crop_costs, alpha=ALPHA, beta=BETA):
+        self.field_yields = np.asarray(field_yields, dtype=float)
+        self.crop_costs = np.asarray(crop_costs, dtype=float)
+        self.n_fields, self.k = self.field_yields.shape
+        self.alpha, self.beta = alpha, beta
+        # нормировка считается один раз на задачу, а не для каждой особи
+        self.max_yield = np.sum(np.max(self.field_yields, axis=1))
+        self.max_cost = self.n_fields * np.max(self.crop_costs)
+        # смещения строк для выборки из развернутой матрицы урожайности
+        self._offsets = np.arange(self.n_fields) * self.k
+        self._flat_yields = self.field_yields.ravel()
+        self.cache = None
+
+    def enable_cache(self, maxsize=100_000):
+        self.cache = FitnessCache(maxsize, genome_dtype(self.k))
+        return self.cache
+
+    def score(self, total_yield, total_cost):
+        return self.alpha * total_yield / self.max_yield - self.beta * total_cost / self.max_cost
+
+    # приращение урожая и стоимости при замене генов old -> new в позициях pos;
+    # стоит O(числа измененных генов), а не O(n_fields)
+    def delta(self, pos, old, new):
+        d_yield = self.field_yields[pos, new] - self.field_yields[pos, old]
+        d_cost = self.crop_costs[new] - self.crop_costs[old]
+        return d_yield.sum(axis=-1), d_cost.sum(axis=-1)
+
+    def evaluate(self, genomes):
+        genomes = np.asarray(genomes)
+        if self.cache is not None:
+            return self.cache.evaluate(genomes, self._evaluate)
+        return self._evaluate(genomes)
+
+    # оценка всей популяции (pop_size, n_fields) одним gather + reduce
+    @profiling.timed("ml1.evaluate_population")
+    def _evaluate(self, genomes):
+        total_yield = np.empty(len(genomes))
+        total_cost = np.empty(len(genomes))
+        step = max(1, self.CHUNK_GENES // max(1, self.n_fields))
+        for start in range(0, len(genomes), step):
+            block = genomes[start:start + step]
+            total_yield[start:start + step] = self._flat_yields[block + self._offsets].sum(axis=1)
+            total_cost[start:start + step] = self.crop_costs[block].sum(axis=1)
+        return self.score(total_yield, total_cost), total_yield, total_cost
+
+    # синтетическая задача заданного размера (для бенчмарков)
+    @classmethod
+    def random(cls, n_fields, k, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        yields = rng.uniform(1.0, 5.0, size=(n_fields, k)).round(2)
+        costs = rng.integers(20, 60, size=k)
+        return cls(yields, costs)
+
+PROBLEM = Problem(field_yields, crop_costs)
+
 # класс особи 
 class Individual:
-    def __init__(self, genome):
+    def __init__(self, genome, values=None):
         self.genome = genome
-        self.fitness, self.total_yield, self.total_cost = self.calculate_fitness()
+        if values is not None:
+            self.fitness, self.total_yield, self.total_cost = values
+            return
+        cache = PROBLEM.cache
+        if cache is None:
+            self.fitness, self.total_yield, self.total_cost = self.calculate_fitness()
+            return
+        key = cache.key(genome)
+        values = cache.get(key)
+        if values is None:
+            values = self.calculate_fitness()
+            cache.put(key, values)
+        self.fitness, self.total_yield, self.total_cost = values
 
+    @profiling.timed("ml1.calculate_fitness")
     def calculate_fitness(self):
         total_yield = np.sum(field_yields[np.arange(N_FIELDS), self.genome])
         total_cost = np.sum(crop_costs[self.genome])
-        max_yield = np.sum(np.max(field_yields, axis=1))
-        max_cost = N_FIELDS * np.max(crop_costs)
-        norm_yield = total_yield / max_yield
-        norm_cost = total_cost / max_cost
+        norm_yield = total_yield / PROBLEM.max_yield
+        norm_cost = total_cost / PROBLEM.max_cost
         score = ALPHA * norm_yield - BETA * norm_cost
         return score, total_yield, total_cost
 
+# популяция целиком (структура массивов): непрерывная матрица генов
+# компактного типа и столбцы float32 для фитнеса, урожая и стоимости
+class Population:
+    VALUE_DTYPE = np.float32
+    # ключ турнирного отбора NSGA-II (фронт и скученность), если популяция - выжившие evolve_pareto
+    pareto_key = None
+
+    def __init__(self, problem, genomes, values=None):
+        self.problem = problem
+        self.genomes = np.ascontiguousarray(genomes, dtype=genome_dtype(problem.k))
+        if values is None:
+            values = problem.evaluate(self.genomes)
+        self.fitness, self.total_yield, self.total_cost = (
+            np.asarray(column, dtype=self.VALUE_DTYPE) for column in values)
+
+    def __len__(self):
+        return len(self.genomes)
+
+    def __getitem__(self, index):
+        return IndividualView(self, index)
+
+    def __iter__(self):
+        return (IndividualView(self, i) for i in range(len(self)))
+
+    @classmethod
+    def random(cls, problem, size, rng=None):
+        shape, dtype = (size, problem.n_fields), genome_dtype(problem.k)
+        if rng is None:
+            genomes = np.random.randint(0, problem.k, size=shape, dtype=dtype)
+        else:
+            genomes = rng.integers(0, problem.k, size=shape, dtype=dtype)
+        return cls(problem, genomes)
+
+    @classmethod
+    def from_individuals(cls, individuals, problem=PROBLEM):
+        genomes = np.array([ind.genome for ind in individuals])
+        return cls(problem, genomes)
+
+    def best(self):
+        i = int(np.argmax(self.fitness))
+        return self.genomes[i], self.fitness[i], self.total_yield[i], self.total_cost[i]
+
+# особь как представление строки популяции, без копирования данных
+class IndividualView:
+    __slots__ = ("population", "index")
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    @property
+    def genome(self):
+        return self.population.genomes[self.index]
+
+    @property
+    def fitness(self):
+        return self.population.fitness[self.index]
+
+    @property
+    def total_yield(self):
+        return self.population.total_yield[self.index]
+
+    @property
+    def total_cost(self):
+        return self.population.total_cost[self.index]
+
+# история всех поколений в файлах .npy, отображенных в память
+class PopulationHistory:
+    def __init__(self, path, problem, generations, pop_size, mode="w+"):
+        self.path = path
+        self.problem = problem
+        if mode == "w+":
+            os.makedirs(path, exist_ok=True)
+        genomes_shape = (generations, pop_size, problem.n_fields)
+        values_shape = (generations, pop_size, 3)
+        self.genomes = np.lib.format.open_memmap(
+            os.path.join(path, "genomes.npy"), mode=mode,
+            dtype=genome_dtype(problem.k) if mode == "w+" else None,
+            shape=genomes_shape if mode == "w+" else None)
+        self.values = np.lib.format.open_memmap(
+            os.path.join(path, "values.npy"), mode=mode,
+            dtype=Population.VALUE_DTYPE if mode == "w+" else None,
+            shape=values_shape if mode == "w+" else None)
+        self.size = 0 if mode == "w+" else len(self.genomes)
+
+    @classmethod
+    def open(cls, path, problem, mode="r"):
+        return cls(path, problem, None, None, mode=mode)
+
+    def append(self, population):
+        g = self.size
+        self.genomes[g] = population.genomes
+        self.values[g, :, 0] = population.fitness
+        self.values[g, :, 1] = population.total_yield
+        self.values[g, :, 2] = population.total_cost
+        self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, g):
+        values = self.values[g]
+        return Population(self.problem, self.genomes[g], (values[:, 0], values[:, 1], values[:, 2]))
+
+    def flush(self):
+        self.genomes.flush()
+        self.values.flush()
+
 #создание популяции 
 def create_random_individual():
     genome = np.random.randint(0, K, size=N_FIELDS)
@@ -70,27 +324,162 @@ def uniform_crossover(parent1, parent2):
     child2 = np.where(mask, parent2.genome, parent1.genome)
     return Individual(child1), Individual(child2)
 
-# Мутации 
+# Мутации: фитнес потомка пересчитывается от родителя только по измененным генам
+def _mutated(ind, genome, pos):
+    d_yield, d_cost = PROBLEM.delta(pos, ind.genome[pos], genome[pos])
+    total_yield = ind.total_yield + d_yield
+    total_cost = ind.total_cost + d_cost
+    return Individual(genome, (PROBLEM.score(total_yield, total_cost), total_yield, total_cost))
+
 def random_reset(ind):
     genome = ind.genome.copy()
     pos = np.random.randint(N_FIELDS)
     genome[pos] = np.random.randint(K)
-    return Individual(genome)
+    return _mutated(ind, genome, np.array([pos]))
 
 def swap_mutation(ind):
     genome = ind.genome.copy()
     i, j = np.random.choice(N_FIELDS, 2, replace=False)
     genome[i], genome[j] = genome[j], genome[i]
-    return Individual(genome)
+    return _mutated(ind, genome, np.array([i, j]))
 
 def inversion_mutation(ind):
     genome = ind.genome.copy()
     i, j = sorted(np.random.choice(N_FIELDS, 2, replace=False))
     genome[i:j+1] = genome[i:j+1][::-1]
-    return Individual(genome)
+    return _mutated(ind, genome, np.arange(i, j + 1))
+
+# Пакетные операторы: целое поколение за раз по матрице генов
+def _rng(rng):
+    return np.random.default_rng() if rng is None else rng
+
+# k различных индексов из n для каждой строки (векторизованный алгоритм Флойда)
+def _sample_distinct(rng, n, k, size):
+    chosen = np.empty((size, k), dtype=np.int64)
+    for col, j in enumerate(range(n - k, n)):
+        t = rng.integers(0, j + 1, size=size)
+        seen = (chosen[:, :col] == t[:, None]).any(axis=1)
+        chosen[:, col] = np.where(seen, j, t)
+    return chosen
+
+def batch_select_parents(fitness, n_pairs, rng=None, tournament=5):
+    rng = _rng(rng)
+    candidates = _sample_distinct(rng, len(fitness), tournament, n_pairs)
+    order = np.argsort(-fitness[candidates], axis=1, kind="stable")[:, :2]
+    parents = np.take_along_axis(candidates, order, axis=1)
+    return parents[:, 0], parents[:, 1]
+
+def batch_single_point_crossover(genomes1, genomes2, rng=None):
+    rng = _rng(rng)
+    n_pairs, n = genomes1.shape
+    points = rng.integers(1, n, size=n_pairs)
+    mask = np.arange(n) < points[:, None]
+    return np.where(mask, genomes1, genomes2), np.where(mask, genomes2, genomes1)
+
+def batch_two_point_crossover(genomes1, genomes2, rng=None):
+    rng = _rng(rng)
+    n_pairs, n = genomes1.shape
+    points = np.sort(rng.integers(1, n, size=(n_pairs, 2)), axis=1)
+    cols = np.arange(n)
+    mask = (cols >= points[:, :1]) & (cols < points[:, 1:])
+    return np.where(mask, genomes2, genomes1), np.where(mask, genomes1, genomes2)
+
+def batch_uniform_crossover(genomes1, genomes2, rng=None):
+    rng = _rng(rng)
+    mask = rng.random(genomes1.shape) < 0.5
+    return np.where(mask, genomes1, genomes2), np.where(mask, genomes2, genomes1)
+
+# варианты *_delta дополнительно возвращают измененные позиции (m, c),
+# старые и новые гены в них - для пересчета фитнеса через Problem.delta
+def batch_random_reset_delta(genomes, k, rng=None):
+    rng = _rng(rng)
+    genomes = genomes.copy()
+    rows = np.arange(len(genomes))
+    pos = rng.integers(0, genomes.shape[1], size=len(genomes))
+    old = genomes[rows, pos]
+    genomes[rows, pos] = rng.integers(0, k, size=len(genomes))
+    return genomes, pos[:, None], old[:, None], genomes[rows, pos][:, None]
+
+def batch_random_reset(genomes, k, rng=None):
+    return batch_random_reset_delta(genomes, k, rng)[0]
+
+def batch_swap_mutation_delta(genomes, k, rng=None):
+    rng = _rng(rng)
+    genomes = genomes.copy()
+    rows = np.arange(len(genomes))[:, None]
+    pos = _sample_distinct(rng, genomes.shape[1], 2, len(genomes))
+    old = genomes[rows, pos]
+    genomes[rows, pos] = old[:, ::-1]
+    return genomes, pos, old, old[:, ::-1]
+
+def batch_swap_mutation(genomes, k, rng=None):
+    return batch_swap_mutation_delta(genomes, k, rng)[0]
+
+def batch_inversion_mutation(genomes, k, rng=None):
+    rng = _rng(rng)
+    pairs = np.sort(_sample_distinct(rng, genomes.shape[1], 2, len(genomes)), axis=1)
+    i, j = pairs[:, :1], pairs[:, 1:]
+    cols = np.arange(genomes.shape[1])
+    # внутри отрезка [i, j] ген берется с зеркальной позиции i + j - col
+    src = np.where((cols >= i) & (cols <= j), i + j - cols, cols)
+    return np.take_along_axis(genomes, src, axis=1)
+
+# соответствие поштучных операторов пакетным
+BATCH_OPERATORS = {
+    single_point_crossover: batch_single_point_crossover,
+    two_point_crossover: batch_two_point_crossover,
+    uniform_crossover: batch_uniform_crossover,
+    random_reset: batch_random_reset,
+    swap_mutation: batch_swap_mutation,
+    inversion_mutation: batch_inversion_mutation,
+}
+
+DELTA_MUTATIONS = {
+    batch_random_reset: batch_random_reset_delta,
+    batch_swap_mutation: batch_swap_mutation_delta,
+}
+
+def evolve_population_batched(population, crossover, mutation, rng=None):
+    rng = _rng(rng)
+    crossover = BATCH_OPERATORS.get(crossover, crossover)
+    mutation = BATCH_OPERATORS.get(mutation, mutation)
+    problem = population.problem
+    size = len(population)
+    n_pairs = (size + 1) // 2
+    idx1, idx2 = batch_select_parents(population.fitness, n_pairs, rng)
+    children1 = population.genomes[idx1]
+    children2 = population.genomes[idx2]
+    cross = rng.random(n_pairs) < CROSSOVER_PROBABILITY
+    if cross.any():
+        children1[cross], children2[cross] = crossover(children1[cross], children2[cross], rng)
+    # потомки идут парами, как в поштучной версии: c1, c2, c1, c2, ...
+    children = np.stack([children1, children2], axis=1).reshape(2 * n_pairs, -1)[:size]
+    parents = np.stack([idx1, idx2], axis=1).reshape(-1)[:size]
+    # некрещенные потомки наследуют урожай и стоимость родителя
+    total_yield = population.total_yield[parents].astype(float)
+    total_cost = population.total_cost[parents].astype(float)
+    stale = np.repeat(cross, 2)[:size]
+    mutate = rng.random(size) < MUTATION_PROBABILITY
+    if mutate.any():
+        delta_mutation = DELTA_MUTATIONS.get(mutation)
+        if delta_mutation is None:
+            children[mutate] = mutation(children[mutate], problem.k, rng)
+            stale |= mutate
+        else:
+            children[mutate], pos, old, new = delta_mutation(children[mutate], problem.k, rng)
+            d_yield, d_cost = problem.delta(pos, old, new)
+            total_yield[mutate] += d_yield
+            total_cost[mutate] += d_cost
+    fitness = problem.score(total_yield, total_cost)
+    if stale.any():
+        fitness[stale], total_yield[stale], total_cost[stale] = problem.evaluate(children[stale])
+    return Population(problem, children, (fitness, total_yield, total_cost))
 
 # Эволбция
-def evolve_population(population, crossover, mutation):
+@profiling.timed("ml1.evolve_population")
+def evolve_population(population, crossover, mutation, batched=False, rng=None):
+    if batched:
+        return evolve_population_batched(population, crossover, mutation, rng)
     new_pop = []
     while len(new_pop) < len(population):
         p1, p2 = select_parents(population)
@@ -107,6 +496,7 @@ def evolve_population(population, crossover, mutation):
 
 #Эксперимент
 def run_experiment(crossover, mutation, label, color):
+    import matplotlib.pyplot as plt
     population = [create_random_individual() for _ in range(20)]
     best_over_time = []
     for g in range(50):
@@ -118,23 +508,644 @@ def run_experiment(crossover, mutation, label, color):
     print(f"{label}: Урожай={best.total_yield:.2f}, Стоимость={best.total_cost:.2f}, Фитнес={best.fitness:.4f}")
     print("Назначение:", best.genome)
 
- 
-plt.figure(figsize=(10,8))
-run_experiment(single_point_crossover, random_reset, "Single-point + Reset", "red")
-run_experiment(two_point_crossover, random_reset, "Two-point + Reset", "green")
-run_experiment(uniform_crossover, random_reset, "Uniform + Reset", "blue")
-
-run_experiment(single_point_crossover, swap_mutation, "Single-point + Swap", "orange")
-run_experiment(two_point_crossover, swap_mutation, "Two-point + Swap", "purple")
-run_experiment(uniform_crossover, swap_mutation, "Uniform + Swap", "brown")
-
-run_experiment(single_point_crossover, inversion_mutation, "Single-point + Inversion", "pink")
-run_experiment(two_point_crossover, inversion_mutation, "Two-point + Inversion", "cyan")
-run_experiment(uniform_crossover, inversion_mutation, "Uniform + Inversion", "gray")
-
-plt.title("Эволюция функции приспособленности (поля-культуры)")
-plt.xlabel("Поколение")
-plt.ylabel("Лучшая приспособленность")
-plt.legend()
-plt.grid(True)
-plt.show()
+# Сетка экспериментов: каждый запуск со своим независимым генератором
+OPERATORS = {f.__name__: f for f in BATCH_OPERATORS}
+
+def make_grid(crossovers, mutations, seeds, pop_sizes=(20,), generations=(50,)):
+    return [
+        {"crossover": cx, "mutation": mu, "seed": seed, "pop_size": size, "generations": gens}
+        for cx, mu, seed, size, gens in itertools.product(crossovers, mutations, seeds, pop_sizes, generations)
+    ]
+
+def _operator(op):
+    return OPERATORS[op] if isinstance(op, str) else op
+
+# Контрольные точки долгих прогонов: поколение, геномы, столбцы значений, состояние
+# генератора и кривая лучшего в одном .npz. Запись идет в фоновом потоке, атомарно:
+# временный файл, fsync и os.replace. Эволюция записи не ждет: если предыдущий
+# снимок еще не взят писателем, он заменяется свежим
+class Checkpointer:
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue(maxsize=1)
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    # массивы популяции после создания не изменяются, поэтому копируется только кривая
+    def save(self, generation, population, rng, curve, meta):
+        self._check()
+        snapshot = {
+            "generation": np.int64(generation),
+            "genomes": population.genomes, "fitness": population.fitness,
+            "total_yield": population.total_yield, "total_cost": population.total_cost,
+            "curve": curve[:generation].copy(),
+            "rng_state": np.array(json.dumps(rng.bit_generator.state)),
+            "meta": np.array(json.dumps(meta)),
+        }
+        try:
+            self._queue.put_nowait(snapshot)
+        except queue.Full:
+            # кладет в очередь только этот поток, поэтому после изъятия место есть
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(snapshot)
+
+    def _write_loop(self):
+        while (snapshot := self._queue.get()) is not None:
+            try:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, **snapshot)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except Exception as exc:
+                self._error = exc
+
+    def _check(self):
+        if self._error is not None:
+            raise RuntimeError(f"Не удалось записать контрольную точку {self.path}") from self._error
+
+    # дождаться записи последнего снимка
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._check()
+
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            state = {name: data[name] for name in data.files}
+        state["generation"] = int(state["generation"])
+        state["rng_state"] = json.loads(str(state["rng_state"]))
+        state["meta"] = json.loads(str(state["meta"]))
+        return state
+
+def run_job(config, problem=PROBLEM):
+    # поток случайных чисел зависит только от seed: при одинаковом seed
+    # разные пары операторов стартуют с одной и той же популяции
+    start = time.perf_counter()
+    rng = np.random.default_rng(np.random.SeedSequence(config["seed"]))
+    crossover, mutation = _operator(config["crossover"]), _operator(config["mutation"])
+    curve = np.empty(config["generations"])
+    # "checkpoint" - путь .npz: прогон продолжается с последней точки бит в бит
+    checkpoint, first = config.get("checkpoint"), 0
+    # встроенные типы: сиды из make_grid(..., np.arange(n)) приходят как np.int64
+    meta = {"crossover": crossover.__name__, "mutation": mutation.__name__, "seed": int(config["seed"]),
+            "pop_size": int(config["pop_size"]), "generations": int(config["generations"]),
+            "n_fields": int(problem.n_fields), "k": int(problem.k)}
+    if checkpoint and os.path.exists(checkpoint):
+        state = Checkpointer.load(checkpoint)
+        if state["meta"] != meta:
+            raise ValueError(f"Контрольная точка {checkpoint} от другого прогона: {state['meta']}")
+        rng.bit_generator.state = state["rng_state"]
+        population = Population(problem, state["genomes"],
+                                (state["fitness"], state["total_yield"], state["total_cost"]))
+        first = state["generation"]
+        curve[:first] = state["curve"]
+    else:
+        population = Population.random(problem, config["pop_size"], rng)
+    history = None
+    if config.get("history"):
+        if first:
+            history = PopulationHistory.open(config["history"], problem, mode="r+")
+            history.size = first
+        else:
+            history = PopulationHistory(config["history"], problem, config["generations"], config["pop_size"])
+    checkpointer = Checkpointer(checkpoint) if checkpoint else None
+    every = config.get("checkpoint_every", 10)
+    try:
+        for g in range(first, config["generations"]):
+            population = evolve_population(population, crossover, mutation, batched=True, rng=rng)
+            curve[g] = population.fitness.max()
+            if history is not None:
+                history.append(population)
+            if checkpointer is not None and ((g + 1) % every == 0 or g + 1 == config["generations"]):
+                if history is not None:
+                    history.flush()
+                checkpointer.save(g + 1, population, rng, curve, meta)
+    finally:
+        if checkpointer is not None:
+            checkpointer.close()
+    if history is not None:
+        history.flush()
+    genome, fitness, total_yield, total_cost = population.best()
+    return {
+        "crossover": crossover.__name__, "mutation": mutation.__name__,
+        "seed": config["seed"], "pop_size": config["pop_size"], "generations": config["generations"],
+        "best_fitness": float(fitness), "total_yield": float(total_yield), "total_cost": float(total_cost),
+        "genome": genome.copy(), "curve": curve, "elapsed": time.perf_counter() - start,
+    }
+
+def run_grid(configs, problem=PROBLEM, processes=None):
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(run_job, configs, itertools.repeat(problem), chunksize=max(1, len(configs) // 64)))
+
+# Островная модель: подпопуляции в отдельных процессах, обмен лучшими через общую память
+TOPOLOGIES = ("ring", "full")
+# как часто, секунды, проверять, живы ли острова, пока результаты не пришли
+RESULT_POLL = 0.5
+
+def migration_sources(topology, n_islands):
+    if topology == "ring":
+        return [[(i - 1) % n_islands] for i in range(n_islands)]
+    if topology == "full":
+        return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+    raise ValueError(f"Неизвестная топология: {topology}, ожидается одна из {TOPOLOGIES}")
+
+def _island_worker(island, problem, config, seed_seq, sources, boards, barrier, results):
+    segments = [shared_memory.SharedMemory(name=name) for name, _, _ in boards]
+    try:
+        (_, g_shape, g_dtype), (_, v_shape, v_dtype) = boards
+        board_genomes = np.ndarray(g_shape, dtype=g_dtype, buffer=segments[0].buf)
+        board_values = np.ndarray(v_shape, dtype=v_dtype, buffer=segments[1].buf)
+        rng = np.random.default_rng(seed_seq)
+        crossover, mutation = _operator(config["crossover"]), _operator(config["mutation"])
+        n_migrants = config["n_migrants"]
+        population = Population.random(problem, config["pop_size"], rng)
+        curve = np.empty(config["generations"])
+        for g in range(config["generations"]):
+            population = evolve_population(population, crossover, mutation, batched=True, rng=rng)
+            if (g + 1) % config["interval"] == 0:
+                top = np.argsort(population.fitness)[-n_migrants:]
+                board_genomes[island] = population.genomes[top]
+                board_values[island] = np.stack([population.fitness[top], population.total_yield[top],
+                                                 population.total_cost[top]], axis=1)
+                barrier.wait()
+                # мигранты замещают худших особей острова, фитнес не пересчитывается
+                incoming = board_genomes[sources].reshape(-1, problem.n_fields)
+                values = board_values[sources].reshape(-1, 3)
+                worst = np.argsort(population.fitness)[:len(incoming)]
+                genomes = population.genomes.copy()
+                columns = [population.fitness.copy(), population.total_yield.copy(), population.total_cost.copy()]
+                genomes[worst] = incoming
+                for column, incoming_values in zip(columns, values.T):
+                    column[worst] = incoming_values
+                # доску можно перезаписывать только после того, как все острова ее прочли
+                barrier.wait()
+                population = Population(problem, genomes, columns)
+            curve[g] = population.fitness.max()
+        genome, fitness, total_yield, total_cost = population.best()
+        results.put({"island": island, "best_fitness": float(fitness), "total_yield": float(total_yield),
+                     "total_cost": float(total_cost), "genome": genome.copy(), "curve": curve})
+    except Exception as exc:
+        barrier.abort()
+        results.put({"island": island, "error": repr(exc)})
+    finally:
+        for segment in segments:
+            segment.close()
+
+def run_islands(crossover, mutation, problem=PROBLEM, n_islands=None, pop_size=20, generations=50,
+                interval=5, n_migrants=2, topology="ring", seed=0):
+    n_islands = n_islands or os.cpu_count() or 1
+    sources = migration_sources(topology, n_islands)
+    if n_migrants * max(len(s) for s in sources) >= pop_size:
+        raise ValueError("Мигранты должны замещать меньше особей, чем размер острова")
+    config = {"crossover": crossover, "mutation": mutation, "pop_size": pop_size,
+              "generations": generations, "interval": interval, "n_migrants": n_migrants}
+    layouts = [((n_islands, n_migrants, problem.n_fields), np.dtype(genome_dtype(problem.k))),
+               ((n_islands, n_migrants, 3), np.dtype(Population.VALUE_DTYPE))]
+    segments = [shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * dtype.itemsize)
+                for shape, dtype in layouts]
+    boards = [(segment.name, shape, dtype) for segment, (shape, dtype) in zip(segments, layouts)]
+    barrier, results = Barrier(n_islands), Queue()
+    seeds = np.random.SeedSequence(seed).spawn(n_islands)
+    workers = [Process(target=_island_worker,
+                       args=(i, problem, config, seeds[i], sources[i], boards, barrier, results))
+               for i in range(n_islands)]
+    try:
+        for worker in workers:
+            worker.start()
+        islands = []
+        while len(islands) < n_islands:
+            try:
+                islands.append(results.get(timeout=RESULT_POLL))
+            except queue.Empty:
+                # остров, убитый извне (OOM, сигнал), не пришлет ни результата, ни ошибки
+                dead = [i for i, worker in enumerate(workers) if worker.exitcode not in (None, 0)]
+                if dead:
+                    barrier.abort()
+                    raise RuntimeError(f"Острова {dead} завершились аварийно, коды "
+                                       f"{[workers[i].exitcode for i in dead]}") from None
+        islands.sort(key=lambda r: r["island"])
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+    errors = [r for r in islands if "error" in r]
+    if errors:
+        raise RuntimeError(f"Острова завершились с ошибкой: {errors}")
+    return {"islands": islands, "best": max(islands, key=lambda r: r["best_fitness"])}
+
+# Точное решение: целевая функция сепарабельна по полям, поэтому оптимум -
+# лучшая культура на каждом поле, O(n_fields * k)
+def _gains(problem):
+    return (problem.alpha * problem.field_yields / problem.max_yield
+            - problem.beta * problem.crop_costs / problem.max_cost)
+
+def _solution(problem, genome, status="optimal", **extra):
+    fitness, total_yield, total_cost = problem._evaluate(genome[None])
+    return {"genome": genome, "fitness": float(fitness[0]), "total_yield": float(total_yield[0]),
+            "total_cost": float(total_cost[0]), "status": status, **extra}
+
+def solve_exact(problem=PROBLEM):
+    genome = np.argmax(_gains(problem), axis=1).astype(genome_dtype(problem.k))
+    return _solution(problem, genome)
+
+# Вариант с ограничениями: quotas[c] - не больше полей под культуру c,
+# budget - потолок общей стоимости. Стоимость зависит только от культуры, поэтому
+# при известном числе полей под каждой культурой остается транспортная задача
+# (поля -> культуры с емкостями), а бюджет касается только этих чисел. Метод ветвей
+# и границ перебирает векторы чисел полей; граница - двойственная функция Лагранжа
+# (цены квот mu и цена бюджета lam), каждый лист решается точно
+
+# сумма values по r полям, занимающим культуры в порядке order до емкостей caps
+def _fill(values, order, caps, r):
+    caps = caps[order]
+    take = np.minimum(caps, np.maximum(r - (np.cumsum(caps) - caps), 0))
+    return float(take @ values[order])
+
+# лучший перенос поля из культуры c в культуру d: выигрыш w[c, d] и номер поля
+def _moves(profit, assignment, fields, k):
+    w = np.full((k, k), -np.inf)
+    mover = np.zeros((k, k), dtype=int)
+    for c in range(k):
+        rows = fields[assignment[fields] == c]
+        if rows.size:
+            diff = profit[rows] - profit[rows, c][:, None]
+            arg = np.argmax(diff, axis=0)
+            w[c], mover[c] = diff[arg, np.arange(k)], rows[arg]
+        w[c, c] = -np.inf
+    return w, mover
+
+# самые выгодные цепочки переносов из начальных выигрышей dist (Беллман - Форд по k культурам);
+# pred - культура, из которой поле переходит в данную
+def _longest(dist, w):
+    k = len(dist)
+    pred = np.full(k, -1)
+    for _ in range(k):
+        through = dist[:, None] + w
+        src = np.argmax(through, axis=0)
+        best = through[src, np.arange(k)]
+        improved = best > dist + 1e-12
+        if not improved.any():
+            break
+        dist[improved], pred[improved] = best[improved], src[improved]
+    return dist, pred
+
+# транспортная задача на максимум: поля добавляются по одному, каждое - по самому
+# выгодному пути переназначений до культуры со свободной квотой. С готовым назначением
+# (оптимальным для других квот) излишки переводятся такими же путями в недобравшие
+# культуры - так соседние векторы квот решаются за несколько путей.
+# Возвращает назначение и двойственные цены квот mu >= 0
+def _transport(profit, quotas, assignment=None):
+    n, k = profit.shape
+    if assignment is None:
+        assignment = np.full(n, -1)
+        load = np.zeros(k, dtype=int)
+        for i in range(n):
+            c = int(np.argmax(profit[i]))
+            if load[c] < quotas[c]:
+                assignment[i] = c
+                load[c] += 1
+                continue
+            w, mover = _moves(profit, assignment, np.arange(i), k)
+            dist, pred = _longest(profit[i].copy(), w)
+            free = np.flatnonzero(load < quotas)
+            d = int(free[np.argmax(dist[free])])
+            load[d] += 1
+            while pred[d] >= 0:
+                c = int(pred[d])
+                assignment[mover[c, d]] = d
+                d = c
+            assignment[i] = d
+    else:
+        assignment = assignment.copy()
+        load = np.bincount(assignment, minlength=k)
+        while (load > quotas).any():
+            source = int(np.argmax(load - quotas))
+            w, mover = _moves(profit, assignment, np.arange(n), k)
+            start = np.full(k, -np.inf)
+            start[source] = 0.0
+            dist, pred = _longest(start, w)
+            free = np.flatnonzero(load < quotas)
+            d = int(free[np.argmax(dist[free])])
+            load[source] -= 1
+            load[d] += 1
+            while d != source:
+                c = int(pred[d])
+                assignment[mover[c, d]] = d
+                d = c
+    # цены квот: кратчайшие пути от заполненных культур до свободных по длинам -w
+    w, _ = _moves(profit, assignment, np.arange(n), k)
+    free = load < quotas
+    mu = np.where(free | ~free.any(), 0.0, np.inf)
+    for _ in range(k):
+        mu = np.minimum(mu, np.min(mu[None, :] - w, axis=1))
+    mu = np.maximum(mu - min(mu.min(), 0.0), 0.0)
+    return assignment, mu
+
+# жадное восстановление допустимости по бюджету и улучшение одиночными переносами
+def _repair(gains, costs, quotas, budget, assignment):
+    n, k = gains.shape
+    rows = np.arange(n)
+    assignment = assignment.copy()
+    load = np.bincount(assignment, minlength=k)
+    total = costs[assignment].sum()
+    while True:
+        loss = gains[rows, assignment][:, None] - gains
+        saving = costs[assignment][:, None] - costs[None, :]
+        room = (load < quotas)[None, :]
+        if total > budget:
+            # перенос с наименьшей потерей на единицу сэкономленной стоимости
+            allowed = room & (saving > 0)
+            score = np.where(allowed, loss / np.where(saving > 0, saving, 1.0), np.inf)
+        else:
+            allowed = room & (saving >= total - budget) & (loss < -1e-12)
+            score = np.where(allowed, loss, np.inf)
+        i, c = np.unravel_index(np.argmin(score), score.shape)
+        if not np.isfinite(score[i, c]):
+            break
+        load[assignment[i]] -= 1
+        load[c] += 1
+        total -= saving[i, c]
+        assignment[i] = c
+    return assignment if total <= budget else None
+
+def solve_constrained(problem=PROBLEM, quotas=None, budget=None, node_limit=1_000_000):
+    gains = _gains(problem)
+    costs = problem.crop_costs
+    n, k = gains.shape
+    rows = np.arange(n)
+    quotas = np.full(k, n) if quotas is None else np.minimum(np.asarray(quotas, dtype=int), n)
+    budget = np.inf if budget is None else float(budget)
+    cheapest = np.argsort(costs, kind="stable")
+    # допустимость определяется только числом полей под культурами: проверка точная
+    if quotas.sum() < n or _fill(costs, cheapest, quotas, n) > budget:
+        return {"genome": None, "fitness": None, "status": "infeasible", "nodes": 0}
+
+    def relaxed(lam):
+        assignment, mu = _transport(gains - lam * costs, quotas)
+        return assignment, mu, gains[rows, assignment].sum(), costs[assignment].sum()
+
+    # lam = 0: бюджет не мешает, решение транспортной задачи оптимально
+    low = relaxed(0.0)
+    if low[3] <= budget:
+        return _solution(problem, low[0].astype(genome_dtype(k)), nodes=0, bound=float(low[2]))
+    # при большом lam задача сводится к минимуму стоимости, он укладывается в бюджет
+    lam = 2 * (np.ptp(gains) + 1e-12) / np.diff(np.unique(costs)).min()
+    high = relaxed(lam)
+    for _ in range(60):
+        if high[3] <= budget:
+            break
+        lam *= 2
+        high = relaxed(lam)
+    # минимум двойственной функции L(lam) = max(v - lam * c) + lam * budget: пересечение
+    # прямых двух решений по разные стороны бюджета, пока не найдется новое решение
+    for _ in range(200):
+        lam = (low[2] - high[2]) / (low[3] - high[3])
+        middle = relaxed(lam)
+        mu = middle[1]
+        if middle[2] - lam * middle[3] <= low[2] - lam * low[3] + 1e-12:
+            break
+        if middle[3] <= budget:
+            high = middle
+        else:
+            low = middle
+
+    bound = (gains - lam * costs - mu).max(axis=1).sum() + mu @ quotas + lam * budget
+
+    incumbents = [high[0], _repair(gains, costs, quotas, budget, high[0]),
+                  _repair(gains, costs, quotas, budget, low[0])]
+    best_value, best_assignment = -np.inf, None
+    for assignment in incumbents:
+        if assignment is not None and gains[rows, assignment].sum() > best_value:
+            best_value, best_assignment = gains[rows, assignment].sum(), assignment
+
+    # для вектора чисел полей counts значение не больше
+    # bound - mu @ (quotas - counts) - lam * (budget - costs @ counts): штраф за
+    # недоиспользованные квоты и бюджет. Культуры фиксируются по одной, от дорогих
+    # к дешевым; для остальных штраф оценивается снизу заполнением по убыванию
+    order = np.argsort(-costs, kind="stable")
+    counts = np.zeros(k, dtype=int)
+    nodes = 0
+    # решение предыдущего листа - начальное назначение для следующего
+    previous = high[0]
+
+    def penalty_left(rest, r, budget_left):
+        by_mu = mu[rest] @ quotas[rest] - _fill(mu, rest[np.argsort(-mu[rest], kind="stable")], quotas, r)
+        dearest = _fill(costs, rest, quotas, r)
+        by_budget = lam * max(budget_left - dearest, 0.0)
+        joint = mu + lam * costs
+        both = (mu[rest] @ quotas[rest] + lam * budget_left
+                - _fill(joint, rest[np.argsort(-joint[rest], kind="stable")], quotas, r))
+        return max(by_mu, by_budget, both, 0.0)
+
+    def search(j, r, budget_left, penalty):
+        nonlocal best_value, best_assignment, nodes, previous
+        crop, rest = order[j], order[j + 1:]
+        if not rest.size:
+            if r > quotas[crop] or costs[crop] * r > budget_left:
+                return
+            counts[crop] = r
+            if bound - penalty - mu[crop] * (quotas[crop] - r) - lam * (budget_left - costs[crop] * r) \
+                    <= best_value + 1e-12:
+                return
+            nodes += 1
+            previous, _ = _transport(gains, counts, previous)
+            value = gains[rows, previous].sum()
+            if value > best_value + 1e-12:
+                best_value, best_assignment = value, previous
+            return
+        cheapest_rest = rest[::-1]
+        for x in range(min(quotas[crop], r), -1, -1):
+            if nodes >= node_limit:
+                return
+            left, spent = r - x, budget_left - costs[crop] * x
+            if quotas[rest].sum() < left or _fill(costs, cheapest_rest, quotas, left) > spent:
+                continue
+            fixed = penalty + mu[crop] * (quotas[crop] - x)
+            if bound - fixed - penalty_left(rest, left, spent) <= best_value + 1e-12:
+                continue
+            nodes += 1
+            counts[crop] = x
+            search(j + 1, left, spent, fixed)
+
+    search(0, n, budget, 0.0)
+    finished = nodes < node_limit
+    genome = best_assignment.astype(genome_dtype(k))
+    return _solution(problem, genome, "optimal" if finished else "node_limit",
+                     nodes=nodes, bound=float(best_value if finished else bound))
+
+# Разрыв оптимальности GA относительно точного решения и время обоих
+def compare_with_exact(configs, problem=PROBLEM, processes=None):
+    start = time.perf_counter()
+    exact = solve_exact(problem)
+    exact["solve_time"] = time.perf_counter() - start
+    rows = run_grid(configs, problem, processes)
+    for row in rows:
+        # популяция хранит фитнес во float32; лучший геном переоценивается в float64,
+        # иначе достигнутый оптимум дает отрицательный разрыв порядка 1e-8
+        row["best_fitness"] = float(problem._evaluate(row["genome"][None])[0][0])
+        row["gap"] = (exact["fitness"] - row["best_fitness"]) / abs(exact["fitness"])
+        # первое поколение, на котором GA достиг оптимума (с точностью float32)
+        reached = np.flatnonzero(row["curve"] >= exact["fitness"] - 1e-6)
+        row["generations_to_optimum"] = int(reached[0]) + 1 if len(reached) else None
+    return exact, rows
+
+# Многокритериальный режим (NSGA-II): урожай максимизируется, стоимость минимизируется
+# без свертки весами ALPHA/BETA; один прогон дает весь фронт Парето.
+# Критерии приводятся к минимизации: столбцы (-урожай, стоимость)
+def pareto_objectives(population):
+    return np.stack([-population.total_yield.astype(float), population.total_cost.astype(float)], axis=1)
+
+# Недоминируемая сортировка. Возвращает номер фронта каждой особи (0 - фронт Парето).
+# Для двух критериев - проход по особям в порядке первого критерия за O(n log n):
+# у каждого фронта хранится последняя добавленная особь, и особь доминируется фронтом
+# тогда и только тогда, когда ее (второй, первый) критерий больше, чем у этой последней.
+# Такие ключи по фронтам возрастают, поэтому фронт особи находится двоичным поиском
+def non_dominated_sort(objectives):
+    objectives = np.asarray(objectives, dtype=float)
+    if objectives.shape[1] != 2:
+        return _dominance_matrix_sort(objectives)
+    order = np.lexsort((objectives[:, 1], objectives[:, 0]))
+    keys = objectives[order][:, ::-1].tolist()
+    rank = np.empty(len(objectives), dtype=np.int64)
+    last = []
+    for i, key in zip(order.tolist(), keys):
+        r = bisect.bisect_left(last, key)
+        if r == len(last):
+            last.append(key)
+        else:
+            last[r] = key
+        rank[i] = r
+    return rank
+
+# общий случай: матрица доминирования (n, n) и снятие фронтов по очереди
+def _dominance_matrix_sort(objectives):
+    n = len(objectives)
+    # матрицы накапливаются по столбцам критериев, без промежуточного (n, n, m)
+    no_worse = np.ones((n, n), dtype=bool)
+    better = np.zeros((n, n), dtype=bool)
+    for column in objectives.T:
+        no_worse &= column[:, None] <= column[None, :]
+        better |= column[:, None] < column[None, :]
+    dominates = no_worse & better
+    # сколько особей доминирует каждую; у снятых фронтов счетчик уходит в -1
+    counts = np.count_nonzero(dominates, axis=0)
+    rank = np.empty(n, dtype=np.int64)
+    front, r = np.flatnonzero(counts == 0), 0
+    while front.size:
+        rank[front] = r
+        counts -= np.count_nonzero(dominates[front], axis=0)
+        counts[front] = -1
+        front, r = np.flatnonzero(counts == 0), r + 1
+    return rank
+
+# Расстояние скученности внутри каждого фронта: по каждому критерию особи фронта
+# сортируются одним lexsort по (фронт, значение); крайние получают бесконечность
+def crowding_distance(objectives, rank):
+    objectives = np.asarray(objectives, dtype=float)
+    distance = np.zeros(len(objectives))
+    for j in range(objectives.shape[1]):
+        order = np.lexsort((objectives[:, j], rank))
+        values, fronts = objectives[order, j], rank[order]
+        first = np.r_[True, fronts[1:] != fronts[:-1]]
+        last = np.r_[fronts[1:] != fronts[:-1], True]
+        span = values[last] - values[first]
+        span = np.where(span > 0, span, 1.0)[np.cumsum(first) - 1]
+        gap = np.zeros(len(values))
+        gap[1:-1] = values[2:] - values[:-2]
+        gap /= span
+        gap[first | last] = np.inf
+        distance[order] += gap
+    return distance
+
+# Ключ турнирного отбора: меньший фронт лучше, при равном фронте - большее расстояние
+def pareto_key(rank, crowding):
+    return -rank + 0.999 * (1.0 - 1.0 / (1.0 + crowding))
+
+def evolve_pareto(population, crossover, mutation, rng=None):
+    rng = _rng(rng)
+    problem = population.problem
+    # ключ выживших уже посчитан при прошлом отборе; заново - только для начальной популяции
+    key = population.pareto_key
+    if key is None:
+        objectives = pareto_objectives(population)
+        rank = non_dominated_sort(objectives)
+        key = pareto_key(rank, crowding_distance(objectives, rank))
+    # потомки строятся пакетными операторами с отбором по ключу вместо фитнеса
+    parents = Population(problem, population.genomes, (key, population.total_yield, population.total_cost))
+    offspring = evolve_population_batched(parents, crossover, mutation, rng)
+    # элитизм: из родителей и потомков остаются лучшие по (фронт, скученность)
+    genomes = np.concatenate([population.genomes, offspring.genomes])
+    total_yield = np.concatenate([population.total_yield, offspring.total_yield])
+    total_cost = np.concatenate([population.total_cost, offspring.total_cost])
+    objectives = np.stack([-total_yield.astype(float), total_cost.astype(float)], axis=1)
+    rank = non_dominated_sort(objectives)
+    crowding = crowding_distance(objectives, rank)
+    keep = np.lexsort((-crowding, rank))[:len(population)]
+    survivors = Population(problem, genomes[keep],
+                           (problem.score(total_yield[keep], total_cost[keep]), total_yield[keep], total_cost[keep]))
+    survivors.pareto_key = pareto_key(rank[keep], crowding[keep])
+    return survivors
+
+# Фронт Парето популяции: уникальные по (урожай, стоимость) точки, по возрастанию стоимости
+def pareto_front(population):
+    objectives = pareto_objectives(population)
+    front = np.flatnonzero(non_dominated_sort(objectives) == 0)
+    _, unique = np.unique(objectives[front], axis=0, return_index=True)
+    front = front[unique]
+    front = front[np.argsort(population.total_cost[front], kind="stable")]
+    return {"genomes": population.genomes[front].copy(),
+            "total_yield": population.total_yield[front].astype(float),
+            "total_cost": population.total_cost[front].astype(float)}
+
+def run_pareto(crossover, mutation, problem=PROBLEM, pop_size=100, generations=100, seed=0):
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    crossover, mutation = _operator(crossover), _operator(mutation)
+    population = Population.random(problem, pop_size, rng)
+    for _ in range(generations):
+        population = evolve_pareto(population, crossover, mutation, rng)
+    return pareto_front(population)
+
+# Лучшая точка фронта для весов alpha/beta: заменяет отдельный прогон на каждую пару весов
+# (оптимум линейной свертки всегда лежит на фронте Парето)
+def best_for_weights(front, alpha, beta, problem=PROBLEM):
+    scores = alpha * front["total_yield"] / problem.max_yield - beta * front["total_cost"] / problem.max_cost
+    i = int(np.argmax(scores))
+    return {"genome": front["genomes"][i], "fitness": float(scores[i]),
+            "total_yield": float(front["total_yield"][i]), "total_cost": float(front["total_cost"][i])}
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10,8))
+    run_experiment(single_point_crossover, random_reset, "Single-point + Reset", "red")
+    run_experiment(two_point_crossover, random_reset, "Two-point + Reset", "green")
+    run_experiment(uniform_crossover, random_reset, "Uniform + Reset", "blue")
+
+    run_experiment(single_point_crossover, swap_mutation, "Single-point + Swap", "orange")
+    run_experiment(two_point_crossover, swap_mutation, "Two-point + Swap", "purple")
+    run_experiment(uniform_crossover, swap_mutation, "Uniform + Swap", "brown")
+
+    run_experiment(single_point_crossover, inversion_mutation, "Single-point + Inversion", "pink")
+    run_experiment(two_point_crossover, inversion_mutation, "Two-point + Inversion", "cyan")
+    run_experiment(uniform_crossover, inversion_mutation, "Uniform + Inversion", "gray")
+
+    plt.title("Эволюция функции приспособленности (поля-культуры)")
+    plt.xlabel("Поколение")
+    plt.ylabel("Лучшая приспособленность")
+    plt.legend()
+    plt.grid(True)
+    plt.show()
@@ -0,0 +1,151 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import main
+
+
+# полный перебор назначений с квотами на культуры и бюджетом
+def brute_force(problem, quotas, budget):
+    best = None
+    for genome in itertools.product(range(problem.k), repeat=problem.n_fields):
+        genome = np.array(genome)
+        if (np.bincount(genome, minlength=problem.k) > quotas).any():
+            continue
+        if problem.crop_costs[genome].sum() > budget:
+            continue
+        fitness = problem._evaluate(genome[None])[0][0]
+        if best is None or fitness > best:
+            best = fitness
+    return best
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_solve_constrained_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n_fields, k = int(rng.integers(2, 6)), int(rng.integers(2, 4))
+    problem = main.Problem.random(n_fields, k, rng)
+    quotas = rng.integers(1, n_fields + 1, size=k)
+    budget = float(rng.uniform(problem.crop_costs.min(), problem.crop_costs.max()) * n_fields)
+    result = main.solve_constrained(problem, quotas, budget)
+    expected = brute_force(problem, quotas, budget)
+    if expected is None:
+        assert result["status"] == "infeasible"
+    else:
+        assert result["status"] == "optimal"
+        assert result["fitness"] == pytest.approx(expected)
+        genome = result["genome"]
+        assert (np.bincount(genome, minlength=k) <= quotas).all()
+        assert problem.crop_costs[genome].sum() <= budget
+
+
+# все назначения разом: n = 11, k = 3 - 177 тысяч геномов
+@pytest.mark.parametrize("seed", range(5))
+def test_solve_constrained_matches_full_enumeration(seed):
+    rng = np.random.default_rng(100 + seed)
+    problem = main.Problem.random(11, 3, rng)
+    genomes = np.array(list(itertools.product(range(3), repeat=11)))
+    fitness = problem._evaluate(genomes)[0]
+    counts = np.stack([(genomes == c).sum(axis=1) for c in range(3)], axis=1)
+    quotas = rng.integers(3, 8, size=3)
+    costs = problem.crop_costs[genomes].sum(axis=1)
+    budget = float(np.quantile(costs[(counts <= quotas).all(axis=1)], 0.2))
+    result = main.solve_constrained(problem, quotas, budget)
+    feasible = (counts <= quotas).all(axis=1) & (costs <= budget)
+    assert result["status"] == "optimal"
+    assert result["fitness"] == pytest.approx(fitness[feasible].max())
+
+
+def test_solve_constrained_large_instance_is_optimal():
+    rng = np.random.default_rng(0)
+    problem = main.Problem.random(200, 6, rng)
+    quotas = np.full(6, 50)
+    unconstrained = main.solve_constrained(problem, quotas)
+    cheapest = np.sort(problem.crop_costs)
+    # бюджет между наименьшей стоимостью при квотах и стоимостью решения без бюджета
+    budget = (cheapest[:4] * 50).sum() + 0.5 * (unconstrained["total_cost"] - (cheapest[:4] * 50).sum())
+    result = main.solve_constrained(problem, quotas, budget)
+    assert result["status"] == "optimal"
+    assert result["fitness"] == pytest.approx(result["bound"])
+    assert result["fitness"] < unconstrained["fitness"]
+    genome = result["genome"]
+    assert (np.bincount(genome, minlength=6) <= quotas).all()
+    assert problem.crop_costs[genome].sum() <= budget
+
+
+def test_solve_constrained_detects_infeasible_budget_at_once():
+    rng = np.random.default_rng(0)
+    problem = main.Problem.random(20, 6, rng)
+    quotas = np.full(6, 4)
+    # самая дешевая культура одна не покрывает все поля: бюджет на 20 ее полей недостижим
+    result = main.solve_constrained(problem, quotas, problem.crop_costs.min() * 20)
+    assert result["status"] == "infeasible"
+    assert result["nodes"] == 0
+
+
+def test_compare_with_exact_gap_is_exact_at_optimum():
+    configs = [{"crossover": "uniform_crossover", "mutation": "random_reset", "seed": seed,
+                "pop_size": 60, "generations": 200} for seed in range(2)]
+    exact, rows = main.compare_with_exact(configs, processes=1)
+    for row in rows:
+        assert row["gap"] >= 0
+        if np.array_equal(row["genome"], exact["genome"]):
+            assert row["gap"] == 0
+
+
+# фронты по определению: снимаются недоминируемые среди оставшихся
+def naive_fronts(objectives):
+    remaining, rank, r = set(range(len(objectives))), np.empty(len(objectives), dtype=int), 0
+    while remaining:
+        front = [i for i in remaining
+                 if not any((objectives[j] <= objectives[i]).all() and (objectives[j] < objectives[i]).any()
+                            for j in remaining)]
+        rank[front] = r
+        remaining -= set(front)
+        r += 1
+    return rank
+
+
+@pytest.mark.parametrize("m", [2, 3])
+@pytest.mark.parametrize("seed", range(20))
+def test_non_dominated_sort_matches_definition(seed, m):
+    rng = np.random.default_rng(seed)
+    # мелкая целочисленная сетка дает много совпадений и равенств по критериям
+    objectives = rng.integers(0, 6, size=(int(rng.integers(1, 40)), m)).astype(float)
+    assert (main.non_dominated_sort(objectives) == naive_fronts(objectives)).all()
+
+
+def test_crowding_distance_marks_front_ends():
+    objectives = np.array([[0.0, 4.0], [1.0, 2.0], [2.0, 1.0], [4.0, 0.0]])
+    rank = main.non_dominated_sort(objectives)
+    distance = main.crowding_distance(objectives, rank)
+    assert (rank == 0).all()
+    assert np.isinf(distance[[0, 3]]).all()
+    assert distance[1:3] == pytest.approx([2 / 4 + 3 / 4, 3 / 4 + 2 / 4])
+
+
+def test_run_job_resumes_bit_for_bit(tmp_path, monkeypatch):
+    problem = main.Problem.random(50, 4, np.random.default_rng(0))
+    config = {"crossover": "uniform_crossover", "mutation": "swap_mutation", "seed": np.int64(5),
+              "pop_size": 30, "generations": 25, "checkpoint_every": 4}
+    reference = main.run_job(config, problem)
+
+    # прогон обрывается на 14-м поколении, последняя контрольная точка - после 12-го
+    evolve, calls = main.evolve_population, [0]
+    def interrupted(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] > 13:
+            raise RuntimeError("узел вытеснен")
+        return evolve(*args, **kwargs)
+    monkeypatch.setattr(main, "evolve_population", interrupted)
+    checkpoint = str(tmp_path / "run.npz")
+    with pytest.raises(RuntimeError):
+        main.run_job({**config, "checkpoint": checkpoint}, problem)
+    monkeypatch.undo()
+    assert main.Checkpointer.load(checkpoint)["generation"] == 12
+
+    resumed = main.run_job({**config, "checkpoint": checkpoint}, problem)
+    assert np.array_equal(resumed["curve"], reference["curve"])
+    assert np.array_equal(resumed["genome"], reference["genome"])
+    assert resumed["best_fitness"] == reference["best_fitness"]
@@ -1,7 +1,15 @@
+import types
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+try:
+    import profiling
+except ImportError:
+    # заглушка, см. profiling.py
+    profiling = types.SimpleNamespace(timed=lambda name: lambda fn: fn)
 
 # --- Трапециевидная функция принадлежности ---
+@profiling.timed("ml2.trapezoid_membership")
 def trapezoid_membership(x, a, b, c, d):
     """
     Трапециевидная функция принадлежности.
@@ -18,13 +26,153 @@ def trapezoid_membership(x, a, b, c, d):
     return 0.0
 
 
+# --- Векторная трапециевидная функция принадлежности ---
+@profiling.timed("ml2.trapezoid_membership_matrix")
+def trapezoid_membership_matrix(x, params):
+    """
+    Трапециевидные функции принадлежности для массива точек за один проход.
+    params - набор трапеций (a, b, c, d), форма (n_sets, 4).
+    Возвращает матрицу (n_sets, *x.shape), совпадающую с trapezoid_membership поэлементно.
+    """
+    x = np.asarray(x, dtype=float)
+    params = np.asarray(params, dtype=float).reshape(-1, 4)
+    a, b, c, d = (col.reshape((-1,) + (1,) * x.ndim) for col in params.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rise = (x - a) / (b - a)
+        fall = (d - x) / (d - c)
+    # порядок условий тот же, что в скалярной версии
+    return np.select(
+        [(x <= a) | (x >= d), (a < x) & (x < b), (b <= x) & (x <= c), (c < x) & (x < d)],
+        [0.0, rise, 1.0, fall],
+        default=0.0,
+    )
+
+
 # --- Импликация минимумом ---
+@profiling.timed("ml2.fuzzy_implication")
 def fuzzy_implication(mu_A, mu_B):
     """
     Импликация минимумом:
     μ(A → B) = min(μA , μB)
+    Принимает массивы любой совместимой формы.
+    """
+    return np.minimum(mu_A, mu_B)
+
+# --- База нечетких правил и вывод ---
+class FuzzyRuleBase:
+    """
+    Декларативная база правил "терм входа → терм выхода".
+    input_params/output_params - словари {терм: (a, b, c, d)},
+    rules - список пар (терм входа, терм выхода).
+    Правила компилируются в индексные массивы и тензор выходных функций
+    принадлежности, поэтому все правила считаются для пакета входов за один вызов.
+    """
+
+    AGGREGATIONS = ("max", "sum")
+
+    def __init__(self, input_params, output_params, rules, output_universe, default=None):
+        self.input_terms = list(input_params)
+        self.output_terms = list(output_params)
+        self.rules = list(rules)
+        self.input_matrix = np.array(list(input_params.values()), dtype=float)
+        self.output_matrix = np.array(list(output_params.values()), dtype=float)
+        self.output_universe = np.asarray(output_universe, dtype=float)
+        self.antecedents = np.array([self.input_terms.index(a) for a, _ in self.rules])
+        self.consequents = np.array([self.output_terms.index(b) for _, b in self.rules])
+        # (n_rules, n_y): выходное множество каждого правила на универсуме выхода
+        self.rule_outputs = trapezoid_membership_matrix(self.output_universe, self.output_matrix)[self.consequents]
+        # значение при нулевой активации всех правил - середина универсума
+        self.default = self.output_universe.mean() if default is None else default
+
+    def firing(self, x):
+        """Степени активации правил: матрица (n_rules, *x.shape)"""
+        return trapezoid_membership_matrix(x, self.input_matrix)[self.antecedents]
+
+    def pointwise_implications(self, x):
+        """min(μA(x), μB(x)) каждого правила на общей оси x: (n_rules, *x.shape)"""
+        mu_out = trapezoid_membership_matrix(x, self.output_matrix)[self.consequents]
+        return fuzzy_implication(self.firing(x), mu_out)
+
+    def aggregate(self, x, method="max"):
+        """Агрегированное выходное множество для пакета входов: (n_inputs, n_y)"""
+        firing = self.firing(np.atleast_1d(x))
+        clipped = fuzzy_implication(firing.T[:, :, None], self.rule_outputs[None, :, :])
+        if method == "max":
+            return clipped.max(axis=1)
+        if method == "sum":
+            return clipped.sum(axis=1)
+        raise ValueError(f"Неизвестная агрегация: {method}, ожидается одна из {self.AGGREGATIONS}")
+
+    def defuzzify(self, aggregated):
+        """Центр тяжести агрегированного множества, (n_inputs,)"""
+        area = aggregated.sum(axis=-1)
+        moment = aggregated @ self.output_universe
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(area > 0, moment / area, self.default)
+
+    def infer(self, x, method="max"):
+        """Четкая рекомендация для каждого входа"""
+        return self.defuzzify(self.aggregate(x, method))
+
+# --- Таблица предвычисленного вывода (LUT) ---
+class InferenceTable:
+    """
+    Отображение вход → рекомендация, заранее рассчитанное на равномерной сетке.
+    Запрос стоит O(1): индекс ячейки вычисляется арифметически,
+    между узлами возможна линейная интерполяция.
+    На диске хранится один .npy-массив [x0, step, v0, v1, ...],
+    который можно отобразить в память при загрузке.
     """
-    return [min(a, b) for a, b in zip(mu_A, mu_B)]
+
+    def __init__(self, x0, step, values):
+        self.x0 = float(x0)
+        self.step = float(step)
+        self.values = values
+        self.last = len(values) - 1
+        # копия значений списком Python для поштучных запросов, создается при первом lookup
+        self._cells = None
+
+    @classmethod
+    def compile(cls, rule_base, lo, hi, n_points=4097, method="max", batch=4096):
+        grid = np.linspace(lo, hi, n_points)
+        values = np.concatenate([rule_base.infer(grid[i:i + batch], method)
+                                 for i in range(0, n_points, batch)])
+        return cls(lo, (hi - lo) / (n_points - 1), values)
+
+    def query(self, x, interpolate=True):
+        """Пакетный запрос для массива входов; для NaN на входе ответ NaN"""
+        pos = np.clip((np.asarray(x, dtype=float) - self.x0) / self.step, 0, self.last)
+        missing = np.isnan(pos)
+        if missing.any():
+            return np.where(missing, np.nan, self.query(np.where(missing, self.x0, x), interpolate))
+        if not interpolate:
+            return self.values[np.rint(pos).astype(np.intp)]
+        i = np.minimum(pos.astype(np.intp), self.last - 1)
+        frac = pos - i
+        return self.values[i] * (1 - frac) + self.values[i + 1] * frac
+
+    def lookup(self, x, interpolate=True):
+        """Запрос одного значения без накладных расходов numpy на массивы"""
+        cells = self._cells
+        if cells is None:
+            cells = self._cells = self.values.tolist()
+        pos = (x - self.x0) / self.step
+        if pos != pos:
+            return float("nan")
+        pos = 0.0 if pos < 0 else self.last if pos > self.last else pos
+        if not interpolate:
+            return cells[int(pos + 0.5)]
+        i = min(int(pos), self.last - 1)
+        frac = pos - i
+        return cells[i] * (1 - frac) + cells[i + 1] * frac
+
+    def save(self, path):
+        np.save(path, np.concatenate([[self.x0, self.step], self.values]))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        data = np.load(path, mmap_mode="r" if mmap else None)
+        return cls(data[0], data[1], data[2:])
 
 
 # --- Универсумы ---
@@ -45,52 +193,63 @@ intensity_params = {
 }
 
 # --- Вычисление функций принадлежности ---
-mu_state = {key: [trapezoid_membership(x, *params) for x in state_values]
-             for key, params in state_params.items()}
-mu_intensity = {key: [trapezoid_membership(x, *params) for x in intensity_values]
-                for key, params in intensity_params.items()}
+mu_state = dict(zip(state_params, trapezoid_membership_matrix(state_values, list(state_params.values()))))
+mu_intensity = dict(zip(intensity_params,
+                        trapezoid_membership_matrix(intensity_values, list(intensity_params.values()))))
+
+# --- Правила: состояние → интенсивность ---
+rules = [
+    ("Устал", "Легкая"),
+    ("Нормально", "Средняя"),
+    ("В форме", "Тяжелая"),
+    ("Устал", "Средняя"),
+    ("Нормально", "Тяжелая"),
+    ("Нормально", "Легкая"),
+    ("В форме", "Средняя"),
+]
+rule_base = FuzzyRuleBase(state_params, intensity_params, rules, intensity_values)
 
 # --- Импликации ---
-imp1 = fuzzy_implication(mu_state["Устал"], mu_intensity["Легкая"])
-imp2 = fuzzy_implication(mu_state["Нормально"], mu_intensity["Средняя"])
-imp3 = fuzzy_implication(mu_state["В форме"], mu_intensity["Тяжелая"])
-
-imp4 = fuzzy_implication(mu_state["Устал"], mu_intensity["Средняя"])
-imp5 = fuzzy_implication(mu_state["Нормально"], mu_intensity["Тяжелая"])
-
-imp6 = fuzzy_implication(mu_state["Нормально"], mu_intensity["Легкая"])
-imp7 = fuzzy_implication(mu_state["В форме"], mu_intensity["Средняя"])
-# --- Построение графиков ---
-fig, axs = plt.subplots(2, 1, figsize=(10, 10))
-fig.suptitle("Нечеткая импликация в спорте (трапециевидные функции)", fontsize=14)
-
-# --- 1. График:
-axs[0].set_title("Функции принадлежности:")
-
-for key, vals in mu_state.items():
-    axs[0].plot(state_values, vals, label=key)
-
-for key, vals in mu_intensity.items():
-    axs[0].plot(intensity_values, vals, label=key)
-
-axs[0].set_xlabel("Состояние/Интенсивность")
-axs[0].set_ylabel("Степень принадлежности")
-axs[0].legend()
-axs[0].grid(True)
-
-# --- 3. График: импликации ---
-axs[1].set_title("Импликации (минимум)")
-axs[1].plot(state_values, imp1, color='blue', linewidth=2, label='Устал → Легкая')
-axs[1].plot(state_values, imp2, color='orange', linewidth=2, label='Нормально → Средняя')
-axs[1].plot(state_values, imp3, color='red', linewidth=2, label='В форме → Тяжелая')
-axs[1].plot(state_values, imp4, color='green', linewidth=2, label='Устал → Средняя')
-axs[1].plot(state_values, imp5, color='yellow', linewidth=2, label='Нормально → Тяжелая')
-axs[1].plot(state_values, imp6, color='pink', linewidth=2, label='Нормально → Легкая')
-axs[1].plot(state_values, imp7, color='gray', linewidth=2, label='В форме → Средняя')
-axs[1].set_xlabel("Состояние игрока")
-axs[1].set_ylabel("μ(Импликация)")
-axs[1].legend()
-axs[1].grid(True)
-
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-plt.show()
+implications = rule_base.pointwise_implications(state_values)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    table = InferenceTable.compile(rule_base, state_values[0], state_values[-1])
+
+    for state in (1.0, 5.0, 7.0, 9.0):
+        print(f"Состояние {state}: рекомендуемая интенсивность "
+              f"{rule_base.infer(state)[0]:.2f} (max), {rule_base.infer(state, 'sum')[0]:.2f} (sum), "
+              f"{table.lookup(state):.2f} (LUT)")
+
+    # --- Построение графиков ---
+    fig, axs = plt.subplots(2, 1, figsize=(10, 10))
+    fig.suptitle("Нечеткая импликация в спорте (трапециевидные функции)", fontsize=14)
+
+    # --- 1. График:
+    axs[0].set_title("Функции принадлежности:")
+
+    for key, vals in mu_state.items():
+        axs[0].plot(state_values, vals, label=key)
+
+    for key, vals in mu_intensity.items():
+        axs[0].plot(intensity_values, vals, label=key)
+
+    axs[0].set_xlabel("Состояние/Интенсивность")
+    axs[0].set_ylabel("Степень принадлежности")
+    axs[0].legend()
+    axs[0].grid(True)
+
+    # --- 3. График: импликации ---
+    axs[1].set_title("Импликации (минимум)")
+    colors = ['blue', 'orange', 'red', 'green', 'yellow', 'pink', 'gray']
+    for (state, intensity), imp, color in zip(rules, implications, colors):
+        axs[1].plot(state_values, imp, color=color, linewidth=2, label=f'{state} → {intensity}')
+    axs[1].set_xlabel("Состояние игрока")
+    axs[1].set_ylabel("μ(Импликация)")
+    axs[1].legend()
+    axs[1].grid(True)
+
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.show()
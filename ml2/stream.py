@@ -0,0 +1,205 @@
+"""
+Потоковая оценка состояния спортсменов.
+Показания вида "id,состояние" приходят непрерывно (сокет, дописываемый файл),
+собираются в микропакеты и оцениваются векторно одним вызовом вывода.
+Очередь между чтением и выводом ограничена: если вывод не успевает,
+чтение приостанавливается (обратное давление), память и задержка ограничены.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import sys
+import time
+
+import numpy as np
+
+from main import InferenceTable, rule_base, state_values
+
+log = logging.getLogger(__name__)
+
+
+def parse_reading(line):
+    """Строка "id,состояние" или "состояние" → (id, состояние).
+    Пустые и некорректные строки (в том числе nan и inf) пропускаются (None),
+    некорректные - с записью в журнал"""
+    line = line.strip()
+    if not line:
+        return None
+    athlete, sep, value = line.rpartition(",")
+    try:
+        state = float(value)
+    except ValueError:
+        state = math.nan
+    if not math.isfinite(state):
+        log.warning("Пропущено некорректное показание: %r", line)
+        return None
+    return (athlete if sep else None), state
+
+
+def default_infer():
+    """Вывод по умолчанию - предвычисленная таблица над универсумом состояний"""
+    return InferenceTable.compile(rule_base, state_values[0], state_values[-1]).query
+
+
+# --- Синхронный вариант: генератор микропакетов ---
+def micro_batches(readings, batch_size=256):
+    """Группирует поток показаний в пакеты не длиннее batch_size"""
+    batch = []
+    for reading in readings:
+        if reading is None:
+            continue
+        batch.append(reading)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def assess_readings(readings, infer=None, batch_size=256):
+    """Генератор рекомендаций (id, состояние, интенсивность) по потоку показаний"""
+    infer = infer or default_infer()
+    for batch in micro_batches(readings, batch_size):
+        states = np.fromiter((value for _, value in batch), dtype=float, count=len(batch))
+        for (athlete, state), intensity in zip(batch, infer(states)):
+            yield athlete, state, float(intensity)
+
+
+# --- Асинхронный вариант с ограничением задержки ---
+async def _fill(source, queue):
+    """Перекачивает показания в очередь и всегда завершает ее маркером конца:
+    None или исключением источника, которое потребитель поднимет у себя"""
+    end = None
+    try:
+        async for reading in source:
+            if reading is not None:
+                await queue.put(reading)
+    except Exception as exc:
+        end = exc
+    await queue.put(end)
+
+
+def _is_end(reading):
+    return reading is None or isinstance(reading, Exception)
+
+
+async def assess_stream(source, infer=None, batch_size=256, max_delay=0.01, queue_size=4096):
+    """
+    Асинхронный генератор рекомендаций.
+    source - асинхронный итератор показаний (id, состояние).
+    Пакет отправляется в вывод, когда набрано batch_size показаний
+    или с первого показания пакета прошло max_delay секунд.
+    """
+    infer = infer or default_infer()
+    queue = asyncio.Queue(maxsize=queue_size)
+    producer = asyncio.create_task(_fill(source, queue))
+    loop = asyncio.get_running_loop()
+    end = None
+    try:
+        done = False
+        while not done:
+            reading = await queue.get()
+            if _is_end(reading):
+                end = reading
+                break
+            batch = [reading]
+            deadline = loop.time() + max_delay
+            while len(batch) < batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    reading = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if _is_end(reading):
+                    end = reading
+                    done = True
+                    break
+                batch.append(reading)
+            states = np.fromiter((value for _, value in batch), dtype=float, count=len(batch))
+            for (athlete, state), intensity in zip(batch, infer(states)):
+                yield athlete, state, float(intensity)
+        # сбой источника доходит до потребителя после уже принятых показаний
+        if end is not None:
+            raise end
+    finally:
+        producer.cancel()
+
+
+# --- Источники показаний ---
+async def tail_file(path, poll_interval=0.1, follow=True):
+    """Читает файл построчно и ждет дописываемые строки (как tail -f).
+    Недописанная строка (без перевода строки) копится, пока писатель ее не закончит"""
+    with open(path, encoding="utf-8") as f:
+        partial = ""
+        while True:
+            line = f.readline()
+            if line.endswith("\n"):
+                yield parse_reading(partial + line)
+                partial = ""
+            elif line:
+                partial += line
+            elif follow:
+                await asyncio.sleep(poll_interval)
+            else:
+                # без слежения файл закончен: последняя строка могла быть без перевода
+                if partial:
+                    yield parse_reading(partial)
+                return
+
+
+async def read_lines(reader):
+    """Показания из asyncio.StreamReader (например, соединения по сокету)"""
+    while line := await reader.readline():
+        yield parse_reading(line.decode("utf-8"))
+
+
+async def serve(host="127.0.0.1", port=8765, infer=None, batch_size=256, max_delay=0.01):
+    """TCP-сервер: клиент шлет строки показаний и получает строки "id,состояние,интенсивность" """
+    infer = infer or default_infer()
+
+    async def handle(reader, writer):
+        try:
+            async for athlete, state, intensity in assess_stream(read_lines(reader), infer, batch_size, max_delay):
+                writer.write(f"{athlete or ''},{state:g},{intensity:.3f}\n".encode("utf-8"))
+                # drain ждет, пока клиент заберет ответы - обратное давление по записи
+                await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+async def _print_stream(source, args):
+    async for athlete, state, intensity in assess_stream(source, batch_size=args.batch, max_delay=args.delay):
+        print(f"{athlete or ''},{state:g},{intensity:.3f}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковая нечеткая оценка нагрузки")
+    parser.add_argument("--file", help="дописываемый файл показаний")
+    parser.add_argument("--port", type=int, help="слушать TCP-порт на localhost")
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--delay", type=float, default=0.01, help="макс. ожидание добора пакета, с")
+    args = parser.parse_args(argv)
+
+    if args.port:
+        asyncio.run(serve(port=args.port, batch_size=args.batch, max_delay=args.delay))
+    elif args.file:
+        asyncio.run(_print_stream(tail_file(args.file), args))
+    else:
+        start = time.perf_counter()
+        count = 0
+        for athlete, state, intensity in assess_readings(map(parse_reading, sys.stdin), batch_size=args.batch):
+            print(f"{athlete or ''},{state:g},{intensity:.3f}")
+            count += 1
+        print(f"{count} показаний за {time.perf_counter() - start:.3f} с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,27 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
 import sqlite3
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 import numpy as np
 
+try:
+    import profiling
+except ImportError:
+    # заглушка, см. profiling.py
+    profiling = types.SimpleNamespace(stage=lambda name: contextlib.nullcontext(), count=lambda name, n=1: None)
+
+# Версия формата конфигурации базы правил. Кэш параметров различает базы правил
+# не по ней, а по отпечатку содержимого конфигурации (CompiledRuleBase.fingerprint)
+RULEBASE_VERSION = 1
+
 class MaterialProperty(Enum):
     ALUMINUM = "Алюминий"
     STEEL = "Сталь" 
@@ -9,54 +29,481 @@ class MaterialProperty(Enum):
     COPPER = "Медь"
     PLASTIC = "Пластик"
 
+class Defuzzifier:
+    """Векторная дефаззификация одной выходной переменной (треугольные множества a, b, c).
+    Методы: centroid - центр тяжести по сетке, bisector - точка, делящая площадь пополам,
+    mom - среднее максимумов, analytic - точный центр тяжести без сетки."""
+    
+    METHODS = ('centroid', 'bisector', 'mom', 'analytic')
+    
+    def __init__(self, terms, sets, x_range, default, n_points=100, method='centroid'):
+        if method not in self.METHODS:
+            raise ValueError(f"Неизвестный метод дефаззификации: {method}")
+        self.terms = tuple(terms)
+        self.sets = np.array(sets, dtype=float)
+        self.default = default
+        self.method = method
+        self.x_range = (float(x_range[0]), float(x_range[1]))
+        self.x_values = np.linspace(x_range[0], x_range[1], n_points)
+        # Треугольные функции принадлежности (n_sets, n_points) считаются один раз
+        a, b, c = (col[:, None] for col in self.sets.T)
+        self.curves = np.clip(np.minimum((self.x_values - a) / (b - a),
+                                         (c - self.x_values) / (c - b)), 0, 1)
+        # Прямые подъема и спада каждого треугольника y = slope * x + offset
+        a, b, c = self.sets.T
+        self.slopes = np.concatenate([1 / (b - a), -1 / (c - b)])
+        self.offsets = np.concatenate([-a / (b - a), c / (c - b)])
+    
+    def activations(self, fuzzy):
+        """Словарь активаций {терм: степень} → вектор в порядке self.terms"""
+        return np.array([fuzzy[term] for term in self.terms], dtype=float)
+    
+    def aggregate(self, activations):
+        """Отсечение кривых уровнем активации и объединение по максимуму: (..., n_sets) → (..., n_points)"""
+        return np.minimum(activations[..., :, None], self.curves).max(axis=-2)
+    
+    def reduce(self, aggregated):
+        """Четкое значение по агрегированной кривой на сетке (..., n_points) → (...)"""
+        x = self.x_values
+        total = aggregated.sum(axis=-1)
+        safe = np.where(total > 0, total, 1)
+        if self.method == 'bisector':
+            # первая точка сетки, где накопленная площадь достигает половины
+            index = (np.cumsum(aggregated, axis=-1) < total[..., None] / 2).sum(axis=-1)
+            value = x[np.minimum(index, len(x) - 1)]
+        elif self.method == 'mom':
+            top = aggregated >= aggregated.max(axis=-1, keepdims=True)
+            value = (top @ x) / top.sum(axis=-1)
+        else:
+            value = (aggregated @ x) / safe
+        return np.where(total > 0, value, self.default)
+    
+    def analytic(self, activations, sets=None):
+        """Точный центр тяжести объединения отсеченных треугольников (..., n_sets) → (...).
+        Агрегированная функция кусочно-линейна; все ее изломы лежат среди попарных
+        пересечений прямых подъема, спада, уровней отсечения и нуля. Между соседними
+        изломами площадь и момент интегрируются в замкнутой форме.
+        sets - другие треугольники (..., n_sets, 3) вместо заданных (для подбора точек)."""
+        h = np.asarray(activations, dtype=float)
+        lo, hi = self.x_range
+        if sets is None:
+            a, b, c = self.sets.T
+            line_slopes, line_offsets = self.slopes, self.offsets
+        else:
+            a, b, c = np.moveaxis(np.asarray(sets, dtype=float), -1, 0)
+            line_slopes = np.concatenate([1 / (b - a), -1 / (c - b)], axis=-1)
+            line_offsets = np.concatenate([-a / (b - a), c / (c - b)], axis=-1)
+        # Прямые: подъемы и спады всех множеств, уровни отсечения, ноль
+        shape = h.shape[:-1]
+        n_lines = line_slopes.shape[-1]
+        slopes = np.concatenate([np.broadcast_to(line_slopes, shape + (n_lines,)),
+                                 np.zeros(shape + (h.shape[-1] + 1,))], axis=-1)
+        offsets = np.concatenate([np.broadcast_to(line_offsets, shape + (n_lines,)),
+                                  h, np.zeros(shape + (1,))], axis=-1)
+        i, j = np.triu_indices(slopes.shape[-1], 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross = (offsets[..., j] - offsets[..., i]) / (slopes[..., i] - slopes[..., j])
+        cross = np.where(np.isfinite(cross), np.clip(cross, lo, hi), lo)
+        points = np.sort(np.concatenate([cross, np.full(shape + (2,), [lo, hi])], axis=-1), axis=-1)
+        # Значения агрегированной функции в изломах
+        a, b, c = a[..., None], b[..., None], c[..., None]
+        tri = np.clip(np.minimum((points[..., None, :] - a) / (b - a), (c - points[..., None, :]) / (c - b)), 0, 1)
+        f = np.minimum(tri, h[..., :, None]).max(axis=-2)
+        x0, x1, f0, f1 = points[..., :-1], points[..., 1:], f[..., :-1], f[..., 1:]
+        width = x1 - x0
+        area = (width * (f0 + f1) / 2).sum(axis=-1)
+        moment = (width * (f0 * (2 * x0 + x1) + f1 * (x0 + 2 * x1)) / 6).sum(axis=-1)
+        safe = np.where(area > 0, area, 1)
+        return np.where(area > 0, moment / safe, self.default)
+    
+    def defuzzify(self, activations):
+        """Дефаззификация пакета векторов активаций (..., n_sets) → (...) выбранным методом"""
+        activations = np.asarray(activations, dtype=float)
+        if self.method == 'analytic':
+            return self.analytic(activations)
+        return self.reduce(self.aggregate(activations))
+    
+    def __call__(self, fuzzy):
+        return float(self.defuzzify(self.activations(fuzzy)))
+
+# Декларативное описание нечеткой системы.
+# Входные термы: (a, b, c, d) - подъем от a до b, спад от c до d,
+# None - соответствующей стороны нет (плечо). Выходные термы - треугольники (a, b, c).
+# Выход: диапазон, значение при нулевой активации, число точек сетки и метод
+# дефаззификации (centroid, bisector, mom или analytic - точный центр тяжести без сетки).
+# Правило: "if" - список (вход, терм), объединяемых по минимуму, "then" - (выход, терм).
+# Необязательный "tuned_from" - отпечаток конфигурации, из которой tuning.py подобрал точки излома.
+FUZZY_CONFIG = {
+    'version': RULEBASE_VERSION,
+    'inputs': {
+        'hardness': {
+            'soft': [None, None, 2, 4],
+            'medium': [2, 4, 6, 8],
+            'hard': [6, 8, None, None],
+        },
+        'tensile_strength': {
+            'low': [None, None, 50, 200],
+            'medium': [100, 250, 250, 400],
+            'high': [300, 500, None, None],
+        },
+        'thermal_conductivity': {
+            'low': [None, None, 10, 50],
+            'medium': [30, 70, 50, 150],
+            'high': [100, 250, None, None],
+        },
+    },
+    'outputs': {
+        'cutting_speed': {
+            'range': [500, 5000], 'default': 2000, 'points': 100, 'method': 'centroid',
+            'sets': {'slow': [500, 1000, 1500], 'medium': [1000, 2000, 3000], 'fast': [2000, 3500, 5000]},
+        },
+        'feed_rate': {
+            'range': [0.05, 1.0], 'default': 0.2, 'points': 100, 'method': 'centroid',
+            'sets': {'slow': [0.05, 0.1, 0.2], 'medium': [0.1, 0.3, 0.5], 'fast': [0.3, 0.6, 1.0]},
+        },
+        'cooling_flow': {
+            'range': [0, 100], 'default': 50, 'points': 100, 'method': 'centroid',
+            'sets': {'low': [0, 20, 40], 'medium': [30, 50, 70], 'high': [60, 80, 100]},
+        },
+    },
+    'rules': [
+        {'if': [['hardness', 'hard']], 'then': ['cutting_speed', 'slow'],
+         'text': "ЕСЛИ твердый ТОГДА скорость медленная"},
+        {'if': [['hardness', 'soft']], 'then': ['cutting_speed', 'fast'],
+         'text': "ЕСЛИ мягкий ТОГДА скорость быстрая"},
+        {'if': [['hardness', 'medium']], 'then': ['cutting_speed', 'medium'],
+         'text': "ЕСЛИ средний ТОГДА скорость средняя"},
+        {'if': [['tensile_strength', 'high']], 'then': ['feed_rate', 'slow'],
+         'text': "ЕСЛИ прочность высокая ТОГДА подача медленная"},
+        {'if': [['tensile_strength', 'low']], 'then': ['feed_rate', 'fast'],
+         'text': "ЕСЛИ прочность низкая ТОГДА подача быстрая"},
+        {'if': [['thermal_conductivity', 'low']], 'then': ['cooling_flow', 'high'],
+         'text': "ЕСЛИ теплопроводность низкая ТОГДА охлаждение сильное"},
+        {'if': [['thermal_conductivity', 'high']], 'then': ['cooling_flow', 'low'],
+         'text': "ЕСЛИ теплопроводность высокая ТОГДА охлаждение слабое"},
+    ],
+}
+
+class CompiledRuleBase:
+    """База правил, скомпилированная из конфигурации в индексные массивы.
+    Функции принадлежности всех входных термов считаются как min(1, подъем, спад)
+    по массивам наклонов и смещений, все правила срабатывают одним шагом min/max."""
+    
+    # Порция пакета при дефаззификации по сетке: буферы порции помещаются в кэш
+    DEFUZZIFY_CHUNK = 256
+    
+    def __init__(self, config):
+        self.config = config
+        self.version = config.get('version', RULEBASE_VERSION)
+        # Отпечаток канонического JSON конфигурации: любая правка термов, выходов
+        # или правил дает новый ключ кэша параметров
+        canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        self.fingerprint = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+        self.input_names = list(config['inputs'])
+        self.output_names = list(config['outputs'])
+        
+        # Входные термы подряд: номер входа и линейные функции подъема/спада
+        self.input_terms = [(name, term) for name in self.input_names for term in config['inputs'][name]]
+        term_index = {key: i for i, key in enumerate(self.input_terms)}
+        self.term_input = np.array([self.input_names.index(name) for name, _ in self.input_terms])
+        params = [config['inputs'][name][term] for name, term in self.input_terms]
+        self.rise_slope, self.rise_offset, self.fall_slope, self.fall_offset = self._slopes(params)
+        
+        # Выходные переменные
+        self.defuzzifiers = {}
+        self.output_terms = []
+        for name in self.output_names:
+            output = config['outputs'][name]
+            self.defuzzifiers[name] = Defuzzifier(output['sets'], list(output['sets'].values()), output['range'],
+                                                  output['default'], output.get('points', 100),
+                                                  output.get('method', 'centroid'))
+            self.output_terms += [(name, term) for term in output['sets']]
+        output_index = {key: i for i, key in enumerate(self.output_terms)}
+        self.output_slices = {}
+        for name in self.output_names:
+            first = output_index[(name, next(iter(config['outputs'][name]['sets'])))]
+            self.output_slices[name] = slice(first, first + len(config['outputs'][name]['sets']))
+        
+        # Правила: индексы посылок (дополнены строкой-единицей) и маска заключений
+        self.rules = config['rules']
+        width = max(len(rule['if']) for rule in self.rules)
+        padding = len(self.input_terms)
+        self.antecedents = np.full((len(self.rules), width), padding)
+        for r, rule in enumerate(self.rules):
+            self.antecedents[r, :len(rule['if'])] = [term_index[tuple(a)] for a in rule['if']]
+        self.consequent_mask = np.zeros((len(self.output_terms), len(self.rules)))
+        for r, rule in enumerate(self.rules):
+            self.consequent_mask[output_index[tuple(rule['then'])], r] = 1.0
+        
+        # Выходы, считаемые по сетке, дефаззифицируются вместе: кривые их термов
+        # лежат в одном тензоре (n_sampled, max_terms, max_points), дополненном нулями
+        # (нулевая кривая не меняет объединение по максимуму), а sampled_terms - номера
+        # соответствующих строк активаций
+        self.sampled = [name for name in self.output_names if self.defuzzifiers[name].method != 'analytic']
+        self.analytic = [name for name in self.output_names if self.defuzzifiers[name].method == 'analytic']
+        n_terms = max([len(self.defuzzifiers[name].terms) for name in self.sampled], default=0)
+        n_points = max([len(self.defuzzifiers[name].x_values) for name in self.sampled], default=0)
+        self.sampled_terms = np.zeros((len(self.sampled), n_terms), dtype=int)
+        self.sampled_curves = np.zeros((len(self.sampled), n_terms, n_points))
+        self.sampled_x = np.zeros((len(self.sampled), n_points))
+        for o, name in enumerate(self.sampled):
+            defuzzifier = self.defuzzifiers[name]
+            rows, points = defuzzifier.curves.shape
+            self.sampled_terms[o, :rows] = range(len(self.output_terms))[self.output_slices[name]]
+            self.sampled_curves[o, :rows, :points] = defuzzifier.curves
+            self.sampled_x[o, :points] = defuzzifier.x_values
+        self.sampled_weights = np.stack([self.sampled_x, np.ones_like(self.sampled_x)], axis=-1)
+        self.sampled_defaults = np.array([self.defuzzifiers[name].default for name in self.sampled], dtype=float)
+        self.sampled_position = [self.sampled.index(name) if name in self.sampled else None
+                                 for name in self.output_names]
+        self.sampled_centroid = all(self.defuzzifiers[name].method == 'centroid' for name in self.sampled)
+    
+    @staticmethod
+    def _slopes(params):
+        """(a, b, c, d) → наклоны и смещения подъема (x-a)/(b-a) и спада (d-x)/(d-c);
+        отсутствующая сторона - константа 1"""
+        rise_slope, rise_offset, fall_slope, fall_offset = (np.zeros(len(params)) for _ in range(4))
+        for i, (a, b, c, d) in enumerate(params):
+            if a is None:
+                rise_offset[i] = 1.0
+            else:
+                rise_slope[i] = 1.0 / (b - a)
+                rise_offset[i] = -a / (b - a)
+            if d is None:
+                fall_offset[i] = 1.0
+            else:
+                fall_slope[i] = -1.0 / (d - c)
+                fall_offset[i] = d / (d - c)
+        return rise_slope, rise_offset, fall_slope, fall_offset
+    
+    def stack_inputs(self, **values):
+        """Входы по именам → матрица (n_inputs, n) в порядке входов конфигурации.
+        Входы приводятся к общей форме и разворачиваются: скаляры дают пакет из одного
+        элемента, многомерные массивы - пакет из всех элементов по порядку"""
+        missing = [name for name in self.input_names if name not in values]
+        if missing:
+            raise ValueError(f"Не заданы входы базы правил: {missing}")
+        columns = np.broadcast_arrays(*(np.asarray(values[name], dtype=float) for name in self.input_names))
+        return np.stack([column.ravel() for column in columns])
+    
+    def positions(self, names, of='inputs'):
+        """Номера переменных names среди входов (of='inputs') или выходов конфигурации"""
+        order = self.input_names if of == 'inputs' else self.output_names
+        missing = [name for name in names if name not in order]
+        if missing:
+            raise ValueError(f"В базе правил нет переменных: {missing}")
+        return tuple(order.index(name) for name in names)
+    
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+    
+    def fuzzify(self, inputs):
+        """Входы (n_inputs, n) → степени всех входных термов (n_terms + 1, n),
+        последняя строка - единицы для дополнения посылок правил"""
+        x = np.asarray(inputs, dtype=float)
+        if x.shape[:1] != (len(self.input_names),) or x.ndim != 2:
+            raise ValueError(f"Ожидается матрица входов ({len(self.input_names)}, n), получено {x.shape}")
+        x = x[self.term_input]
+        rise = x * self.rise_slope[:, None] + self.rise_offset[:, None]
+        fall = x * self.fall_slope[:, None] + self.fall_offset[:, None]
+        mu = np.clip(np.minimum(np.minimum(rise, fall), 1.0), 0.0, 1.0)
+        return np.vstack([mu, np.ones((1, mu.shape[1]))])
+    
+    def fire(self, mu):
+        """Степени термов (n_terms + 1, n) → активации выходных термов (n_out_terms, n)"""
+        firing = mu[self.antecedents].min(axis=1)
+        return (self.consequent_mask[:, :, None] * firing[None, :, :]).max(axis=1)
+    
+    def evaluate(self, inputs):
+        """Четкие значения всех выходов для пакета входов: {выход: массив (n,)}"""
+        with profiling.stage("ml3.batch.fuzzify"):
+            mu = self.fuzzify(inputs)
+        with profiling.stage("ml3.batch.apply_rules"):
+            activations = self.fire(mu)
+        with profiling.stage("ml3.batch.defuzzify"):
+            return self.defuzzify(activations)
+    
+    def defuzzify(self, activations):
+        """Активации выходных термов (n_out_terms, n) → {выход: массив (n,)}.
+        Все выходы, считаемые по сетке, отсекаются и объединяются за один проход;
+        аналитические выходы считаются в замкнутой форме"""
+        crisp = {}
+        if self.sampled:
+            n = activations.shape[1]
+            values = np.empty((len(self.sampled), n))
+            # Объединение отсеченных кривых по термам в двух буферах (n_sampled, chunk, max_points),
+            # переиспользуемых для всех порций пакета и остающихся в кэше процессора
+            shape = (len(self.sampled), min(n, self.DEFUZZIFY_CHUNK), self.sampled_x.shape[1])
+            aggregated_buffer, clipped_buffer = np.empty(shape), np.empty(shape)
+            for start in range(0, n, self.DEFUZZIFY_CHUNK):
+                part = activations[:, start:start + self.DEFUZZIFY_CHUNK]
+                width = part.shape[1]
+                aggregated, clipped = aggregated_buffer[:, :width], clipped_buffer[:, :width]
+                for k in range(self.sampled_terms.shape[1]):
+                    np.minimum(part[self.sampled_terms[:, k], :, None], self.sampled_curves[:, k, None, :],
+                               out=clipped if k else aggregated)
+                    if k:
+                        np.maximum(aggregated, clipped, out=aggregated)
+                if self.sampled_centroid:
+                    # числитель и знаменатель центра тяжести одним умножением на [x, 1]
+                    moments = aggregated @ self.sampled_weights
+                    numerator, denominator = moments[..., 0], moments[..., 1]
+                    safe = np.where(denominator > 0, denominator, 1)
+                    values[:, start:start + width] = np.where(denominator > 0, numerator / safe,
+                                                              self.sampled_defaults[:, None])
+                else:
+                    for o, name in enumerate(self.sampled):
+                        defuzzifier = self.defuzzifiers[name]
+                        values[o, start:start + width] = defuzzifier.reduce(
+                            aggregated[o, :, :len(defuzzifier.x_values)])
+            crisp.update(zip(self.sampled, values))
+        for name in self.analytic:
+            crisp[name] = self.defuzzifiers[name].analytic(activations[self.output_slices[name]].T)
+        return {name: crisp[name] for name in self.output_names}
+    
+    def variable_terms(self, name, mu):
+        """Строки mu, относящиеся ко входу name, в виде словаря {терм: степень}"""
+        return {term: float(mu[i]) for i, (input_name, term) in enumerate(self.input_terms) if input_name == name}
+    
+    def workspace(self):
+        """Буферы для вывода одного набора входов без выделения памяти
+        (для выходов centroid; остальные методы выделяют временные массивы)"""
+        n_terms = len(self.input_terms)
+        mu = np.ones(n_terms + 1)
+        return {
+            'x': np.empty(n_terms), 'rise': np.empty(n_terms), 'fall': np.empty(n_terms), 'mu': mu,
+            'firing_terms': np.empty(self.antecedents.shape), 'firing': np.empty(len(self.rules)),
+            'weighted': np.empty(self.consequent_mask.shape), 'activations': np.empty(len(self.output_terms)),
+            'sampled_activations': np.empty(self.sampled_terms.shape),
+            'clipped': np.empty_like(self.sampled_curves), 'aggregated': np.empty_like(self.sampled_x),
+            'moments': np.empty_like(self.sampled_x), 'numerator': np.empty(len(self.sampled)),
+            'denominator': np.empty(len(self.sampled)), 'filled': np.empty(len(self.sampled), dtype=bool),
+            'sampled_crisp': np.empty(len(self.sampled)),
+            'crisp': np.empty(len(self.output_names)),
+        }
+    
+    def infer_into(self, inputs, ws):
+        """Вывод для одного вектора входов в буферы workspace()"""
+        x, rise, fall, mu = ws['x'], ws['rise'], ws['fall'], ws['mu']
+        np.take(inputs, self.term_input, out=x)
+        np.multiply(x, self.rise_slope, out=rise)
+        rise += self.rise_offset
+        np.multiply(x, self.fall_slope, out=fall)
+        fall += self.fall_offset
+        np.minimum(rise, fall, out=rise)
+        np.clip(rise, 0.0, 1.0, out=mu[:-1])
+        np.take(mu, self.antecedents, out=ws['firing_terms'])
+        ws['firing_terms'].min(axis=1, out=ws['firing'])
+        np.multiply(self.consequent_mask, ws['firing'], out=ws['weighted'])
+        ws['weighted'].max(axis=1, out=ws['activations'])
+        # Все выходы по сетке - одним отсечением и одним максимумом в буферы
+        if self.sampled:
+            np.take(ws['activations'], self.sampled_terms, out=ws['sampled_activations'])
+            np.minimum(self.sampled_curves, ws['sampled_activations'][:, :, None], out=ws['clipped'])
+            ws['clipped'].max(axis=1, out=ws['aggregated'])
+            sampled_crisp = ws['sampled_crisp']
+            if self.sampled_centroid:
+                np.multiply(ws['aggregated'], self.sampled_x, out=ws['moments'])
+                ws['moments'].sum(axis=1, out=ws['numerator'])
+                ws['aggregated'].sum(axis=1, out=ws['denominator'])
+                np.greater(ws['denominator'], 0, out=ws['filled'])
+                np.divide(ws['numerator'], ws['denominator'], out=sampled_crisp, where=ws['filled'])
+                np.logical_not(ws['filled'], out=ws['filled'])
+                np.copyto(sampled_crisp, self.sampled_defaults, where=ws['filled'])
+            else:
+                for o, name in enumerate(self.sampled):
+                    defuzzifier = self.defuzzifiers[name]
+                    sampled_crisp[o] = defuzzifier.reduce(ws['aggregated'][o, :len(defuzzifier.x_values)])
+        for i, name in enumerate(self.output_names):
+            position = self.sampled_position[i]
+            if position is None:
+                ws['crisp'][i] = self.defuzzifiers[name].analytic(ws['activations'][self.output_slices[name]])
+            else:
+                ws['crisp'][i] = ws['sampled_crisp'][position]
+        return ws['crisp']
+
 class FuzzySystem:
     """Система нечеткой логики с фаззификацией и дефаззификацией"""
     
+    # Скомпилированная база правил и выходные переменные (треугольники a, b, c)
+    RULE_BASE = CompiledRuleBase(FUZZY_CONFIG)
+    SPEED = RULE_BASE.defuzzifiers['cutting_speed']
+    FEED = RULE_BASE.defuzzifiers['feed_rate']
+    COOLING = RULE_BASE.defuzzifiers['cooling_flow']
+    
+    @classmethod
+    def use_config(cls, config):
+        """Заменить базу правил (словарь конфигурации или путь к JSON)"""
+        cls.RULE_BASE = CompiledRuleBase.from_json(config) if isinstance(config, str) else CompiledRuleBase(config)
+        cls.SPEED = cls.RULE_BASE.defuzzifiers['cutting_speed']
+        cls.FEED = cls.RULE_BASE.defuzzifiers['feed_rate']
+        cls.COOLING = cls.RULE_BASE.defuzzifiers['cooling_flow']
+    
+    @staticmethod
+    def _fuzzify_variable(name, value):
+        rule_base = FuzzySystem.RULE_BASE
+        inputs = np.zeros((len(rule_base.input_names), 1))
+        inputs[rule_base.input_names.index(name)] = value
+        return rule_base.variable_terms(name, rule_base.fuzzify(inputs)[:, 0])
+    
     @staticmethod
     def fuzzify_hardness(hardness):
         """Фаззификация твердости материала"""
         print(f"\n ФАЗЗИФИКАЦИЯ ТВЕРДОСТИ: {hardness} HB")
         
         # Нечеткие множества для твердости
-        soft = max(0, min(1, (4 - hardness) / 2)) if hardness <= 4 else 0
-        medium = max(0, min(1, (hardness - 2) / 2, (8 - hardness) / 2)) if 2 <= hardness <= 8 else 0
-        hard = max(0, min(1, (hardness - 6) / 2)) if hardness >= 6 else 0
+        fuzzy = FuzzySystem._fuzzify_variable('hardness', hardness)
         
-        print(f"   Мягкий: {soft:.2f}")
-        print(f"   Средний: {medium:.2f}") 
-        print(f"   Твердый: {hard:.2f}")
+        print(f"   Мягкий: {fuzzy['soft']:.2f}")
+        print(f"   Средний: {fuzzy['medium']:.2f}") 
+        print(f"   Твердый: {fuzzy['hard']:.2f}")
         
-        return {'soft': soft, 'medium': medium, 'hard': hard}
+        return fuzzy
     
     @staticmethod
     def fuzzify_strength(strength):
         """Фаззификация прочности материала"""
         print(f"\n ФАЗЗИФИКАЦИЯ ПРОЧНОСТИ: {strength} МПа")
         
-        low = max(0, min(1, (200 - strength) / 150)) if strength <= 200 else 0
-        medium = max(0, min(1, (strength - 100) / 150, (400 - strength) / 150)) if 100 <= strength <= 400 else 0
-        high = max(0, min(1, (strength - 300) / 200)) if strength >= 300 else 0
+        fuzzy = FuzzySystem._fuzzify_variable('tensile_strength', strength)
         
-        print(f"   Низкая: {low:.2f}")
-        print(f"   Средняя: {medium:.2f}")
-        print(f"   Высокая: {high:.2f}")
+        print(f"   Низкая: {fuzzy['low']:.2f}")
+        print(f"   Средняя: {fuzzy['medium']:.2f}")
+        print(f"   Высокая: {fuzzy['high']:.2f}")
         
-        return {'low': low, 'medium': medium, 'high': high}
+        return fuzzy
     
     @staticmethod
     def fuzzify_thermal_conductivity(thermal):
         """Фаззификация теплопроводности"""
         print(f"\n ФАЗЗИФИКАЦИЯ ТЕПЛОПРОВОДНОСТИ: {thermal} Вт/(м·K)")
         
-        low = max(0, min(1, (50 - thermal) / 40)) if thermal <= 50 else 0
-        medium = max(0, min(1, (thermal - 30) / 40, (150 - thermal) / 100)) if 30 <= thermal <= 150 else 0
-        high = max(0, min(1, (thermal - 100) / 150)) if thermal >= 100 else 0
+        fuzzy = FuzzySystem._fuzzify_variable('thermal_conductivity', thermal)
         
-        print(f"   Низкая: {low:.2f}")
-        print(f"   Средняя: {medium:.2f}")
-        print(f"   Высокая: {high:.2f}")
+        print(f"   Низкая: {fuzzy['low']:.2f}")
+        print(f"   Средняя: {fuzzy['medium']:.2f}")
+        print(f"   Высокая: {fuzzy['high']:.2f}")
         
-        return {'low': low, 'medium': medium, 'high': high}
+        return fuzzy
+    
+    @staticmethod
+    def fuzzify_batch(hardness, strength, thermal):
+        """Векторная фаззификация массивов входов без вывода на экран.
+        Возвращает степени всех входных термов (n_terms + 1, n) в порядке RULE_BASE.input_terms"""
+        rule_base = FuzzySystem.RULE_BASE
+        return rule_base.fuzzify(rule_base.stack_inputs(
+            hardness=hardness, tensile_strength=strength, thermal_conductivity=thermal))
+    
+    @staticmethod
+    def apply_rules_batch(mu):
+        """Все правила для пакета: матрицы активаций (n, n_terms) в порядке
+        термов FuzzySystem.SPEED, FEED и COOLING"""
+        rule_base = FuzzySystem.RULE_BASE
+        activations = rule_base.fire(mu)
+        return tuple(activations[rule_base.output_slices[name]].T
+                     for name in ('cutting_speed', 'feed_rate', 'cooling_flow'))
     
     @staticmethod
     def apply_rules(hardness_fuzzy, strength_fuzzy, thermal_fuzzy):
@@ -64,52 +511,24 @@ class FuzzySystem:
         print(f"\n ПРИМЕНЕНИЕ НЕЧЕТКИХ ПРАВИЛ:")
         print("=" * 50)
         
-        # Инициализация выходных нечетких множеств
-        speed_fuzzy = {'slow': 0, 'medium': 0, 'fast': 0}
-        feed_fuzzy = {'slow': 0, 'medium': 0, 'fast': 0}
-        cooling_fuzzy = {'low': 0, 'medium': 0, 'high': 0}
-        
-        # ПРАВИЛО 1: Если материал твердый, то скорость медленная
-        rule1_activation = hardness_fuzzy['hard']
-        speed_fuzzy['slow'] = max(speed_fuzzy['slow'], rule1_activation)
-        print(f" ПРАВИЛО 1: ЕСЛИ твердый ({hardness_fuzzy['hard']:.2f}) ТОГДА скорость медленная")
-        print(f"   → Активация медленной скорости: {rule1_activation:.2f}")
-        
-        # ПРАВИЛО 2: Если материал мягкий, то скорость быстрая
-        rule2_activation = hardness_fuzzy['soft']
-        speed_fuzzy['fast'] = max(speed_fuzzy['fast'], rule2_activation)
-        print(f" ПРАВИЛО 2: ЕСЛИ мягкий ({hardness_fuzzy['soft']:.2f}) ТОГДА скорость быстрая")
-        print(f"   → Активация быстрой скорости: {rule2_activation:.2f}")
-        
-        # ПРАВИЛО 3: Если материал средней твердости, то скорость средняя
-        rule3_activation = hardness_fuzzy['medium']
-        speed_fuzzy['medium'] = max(speed_fuzzy['medium'], rule3_activation)
-        print(f" ПРАВИЛО 3: ЕСЛИ средний ({hardness_fuzzy['medium']:.2f}) ТОГДА скорость средняя")
-        print(f"   → Активация средней скорости: {rule3_activation:.2f}")
-        
-        # ПРАВИЛО 4: Если прочность высокая, то подача медленная
-        rule4_activation = strength_fuzzy['high']
-        feed_fuzzy['slow'] = max(feed_fuzzy['slow'], rule4_activation)
-        print(f" ПРАВИЛО 4: ЕСЛИ прочность высокая ({strength_fuzzy['high']:.2f}) ТОГДА подача медленная")
-        print(f"   → Активация медленной подачи: {rule4_activation:.2f}")
-        
-        # ПРАВИЛО 5: Если прочность низкая, то подача быстрая
-        rule5_activation = strength_fuzzy['low']
-        feed_fuzzy['fast'] = max(feed_fuzzy['fast'], rule5_activation)
-        print(f" ПРАВИЛО 5: ЕСЛИ прочность низкая ({strength_fuzzy['low']:.2f}) ТОГДА подача быстрая")
-        print(f"   → Активация быстрой подачи: {rule5_activation:.2f}")
-        
-        # ПРАВИЛО 6: Если теплопроводность низкая, то охлаждение сильное
-        rule6_activation = thermal_fuzzy['low']
-        cooling_fuzzy['high'] = max(cooling_fuzzy['high'], rule6_activation)
-        print(f"  ПРАВИЛО 6: ЕСЛИ теплопроводность низкая ({thermal_fuzzy['low']:.2f}) ТОГДА охлаждение сильное")
-        print(f"   → Активация сильного охлаждения: {rule6_activation:.2f}")
-        
-        # ПРАВИЛО 7: Если теплопроводность высокая, то охлаждение слабое
-        rule7_activation = thermal_fuzzy['high']
-        cooling_fuzzy['low'] = max(cooling_fuzzy['low'], rule7_activation)
-        print(f"  ПРАВИЛО 7: ЕСЛИ теплопроводность высокая ({thermal_fuzzy['high']:.2f}) ТОГДА охлаждение слабое")
-        print(f"   → Активация слабого охлаждения: {rule7_activation:.2f}")
+        rule_base = FuzzySystem.RULE_BASE
+        fuzzy_inputs = {'hardness': hardness_fuzzy, 'tensile_strength': strength_fuzzy,
+                        'thermal_conductivity': thermal_fuzzy}
+        mu = np.ones((len(rule_base.input_terms) + 1, 1))
+        for i, (name, term) in enumerate(rule_base.input_terms):
+            mu[i, 0] = fuzzy_inputs[name][term]
+        
+        # Все правила срабатывают одним шагом min/max
+        firing = mu[rule_base.antecedents, 0].min(axis=1)
+        activations = rule_base.fire(mu)[:, 0]
+        for number, (rule, activation) in enumerate(zip(rule_base.rules, firing), start=1):
+            print(f" ПРАВИЛО {number}: {rule.get('text', rule)}")
+            print(f"   → Активация: {activation:.2f}")
+        
+        # Выходные нечеткие множества в виде словарей {терм: активация}
+        speed_fuzzy, feed_fuzzy, cooling_fuzzy = (
+            {term: float(activations[i]) for i, (output, term) in enumerate(rule_base.output_terms) if output == name}
+            for name in ('cutting_speed', 'feed_rate', 'cooling_flow'))
         
         print(f"\n НЕЧЕТКИЕ ВЫХОДНЫЕ МНОЖЕСТВА:")
         print(f"   Скорость: медленная={speed_fuzzy['slow']:.2f}, средняя={speed_fuzzy['medium']:.2f}, быстрая={speed_fuzzy['fast']:.2f}")
@@ -118,49 +537,20 @@ class FuzzySystem:
         
         return speed_fuzzy, feed_fuzzy, cooling_fuzzy
     
+    @staticmethod
+    def _describe_sets(defuzzifier, labels, fuzzy, unit):
+        for label, term, (a, _, c) in zip(labels, defuzzifier.terms, defuzzifier.sets):
+            print(f"   {label}: {fuzzy[term]:.2f} → диапазон {a:g}-{c:g} {unit}")
+    
     @staticmethod
     def defuzzify_speed(speed_fuzzy):
         """Дефаззификация скорости резания"""
         print(f"\n🔧 ДЕФАЗЗИФИКАЦИЯ СКОРОСТИ:")
         
-        # Определения нечетких множеств для скорости (об/мин)
-        slow_range = (500, 1000, 1500)    # треугольник: 500-1500, пик на 1000
-        medium_range = (1000, 2000, 3000) # треугольник: 1000-3000, пик на 2000  
-        fast_range = (2000, 3500, 5000)   # треугольник: 2000-5000, пик на 3500
-        
-        # Метод центра тяжести (Centroid)
-        numerator = 0
-        denominator = 0
-        
-        # Генерируем точки для расчета
-        x_values = np.linspace(500, 5000, 100)
-        
-        for x in x_values:
-            # Вычисляем степень принадлежности для каждого x
-            mu_slow = max(0, min(1, (x - slow_range[0]) / (slow_range[1] - slow_range[0]), 
-                              (slow_range[2] - x) / (slow_range[2] - slow_range[1]))) if slow_range[0] <= x <= slow_range[2] else 0
-            
-            mu_medium = max(0, min(1, (x - medium_range[0]) / (medium_range[1] - medium_range[0]), 
-                                (medium_range[2] - x) / (medium_range[2] - medium_range[1]))) if medium_range[0] <= x <= medium_range[2] else 0
-            
-            mu_fast = max(0, min(1, (x - fast_range[0]) / (fast_range[1] - fast_range[0]), 
-                               (fast_range[2] - x) / (fast_range[2] - fast_range[1]))) if fast_range[0] <= x <= fast_range[2] else 0
-            
-            # Объединяем выходные нечеткие множества (метод максимума)
-            mu_output = max(
-                min(mu_slow, speed_fuzzy['slow']),
-                min(mu_medium, speed_fuzzy['medium']), 
-                min(mu_fast, speed_fuzzy['fast'])
-            )
-            
-            numerator += x * mu_output
-            denominator += mu_output
-        
-        speed = numerator / denominator if denominator > 0 else 2000
+        # Метод дефаззификации задается в конфигурации выхода (по умолчанию центр тяжести)
+        speed = FuzzySystem.SPEED(speed_fuzzy)
         
-        print(f"   Медленная: {speed_fuzzy['slow']:.2f} → диапазон 500-1500 об/мин")
-        print(f"   Средняя: {speed_fuzzy['medium']:.2f} → диапазон 1000-3000 об/мин")
-        print(f"   Быстрая: {speed_fuzzy['fast']:.2f} → диапазон 2000-5000 об/мин")
+        FuzzySystem._describe_sets(FuzzySystem.SPEED, ('Медленная', 'Средняя', 'Быстрая'), speed_fuzzy, "об/мин")
         print(f"   → Рассчитанная скорость: {speed:.0f} об/мин")
         
         return round(speed)
@@ -170,40 +560,9 @@ class FuzzySystem:
         """Дефаззификация подачи"""
         print(f"\n ДЕФАЗЗИФИКАЦИЯ ПОДАЧИ:")
         
-        # Определения нечетких множеств для подачи (мм/об)
-        slow_range = (0.05, 0.1, 0.2)    # треугольник: 0.05-0.2, пик на 0.1
-        medium_range = (0.1, 0.3, 0.5)   # треугольник: 0.1-0.5, пик на 0.3
-        fast_range = (0.3, 0.6, 1.0)     # треугольник: 0.3-1.0, пик на 0.6
-        
-        numerator = 0
-        denominator = 0
-        
-        x_values = np.linspace(0.05, 1.0, 100)
-        
-        for x in x_values:
-            mu_slow = max(0, min(1, (x - slow_range[0]) / (slow_range[1] - slow_range[0]), 
-                              (slow_range[2] - x) / (slow_range[2] - slow_range[1]))) if slow_range[0] <= x <= slow_range[2] else 0
-            
-            mu_medium = max(0, min(1, (x - medium_range[0]) / (medium_range[1] - medium_range[0]), 
-                                (medium_range[2] - x) / (medium_range[2] - medium_range[1]))) if medium_range[0] <= x <= medium_range[2] else 0
-            
-            mu_fast = max(0, min(1, (x - fast_range[0]) / (fast_range[1] - fast_range[0]), 
-                               (fast_range[2] - x) / (fast_range[2] - fast_range[1]))) if fast_range[0] <= x <= fast_range[2] else 0
-            
-            mu_output = max(
-                min(mu_slow, feed_fuzzy['slow']),
-                min(mu_medium, feed_fuzzy['medium']),
-                min(mu_fast, feed_fuzzy['fast'])
-            )
-            
-            numerator += x * mu_output
-            denominator += mu_output
-        
-        feed = numerator / denominator if denominator > 0 else 0.2
+        feed = FuzzySystem.FEED(feed_fuzzy)
         
-        print(f"   Медленная: {feed_fuzzy['slow']:.2f} → диапазон 0.05-0.2 мм/об")
-        print(f"   Средняя: {feed_fuzzy['medium']:.2f} → диапазон 0.1-0.5 мм/об") 
-        print(f"   Быстрая: {feed_fuzzy['fast']:.2f} → диапазон 0.3-1.0 мм/об")
+        FuzzySystem._describe_sets(FuzzySystem.FEED, ('Медленная', 'Средняя', 'Быстрая'), feed_fuzzy, "мм/об")
         print(f"   → Рассчитанная подача: {feed:.3f} мм/об")
         
         return round(feed, 3)
@@ -213,40 +572,9 @@ class FuzzySystem:
         """Дефаззификация охлаждения"""
         print(f"\n ДЕФАЗЗИФИКАЦИЯ ОХЛАЖДЕНИЯ:")
         
-        # Определения нечетких множеств для охлаждения (%)
-        low_range = (0, 20, 40)      # треугольник: 0-40, пик на 20
-        medium_range = (30, 50, 70)  # треугольник: 30-70, пик на 50  
-        high_range = (60, 80, 100)   # треугольник: 60-100, пик на 80
+        cooling = FuzzySystem.COOLING(cooling_fuzzy)
         
-        numerator = 0
-        denominator = 0
-        
-        x_values = np.linspace(0, 100, 100)
-        
-        for x in x_values:
-            mu_low = max(0, min(1, (x - low_range[0]) / (low_range[1] - low_range[0]), 
-                             (low_range[2] - x) / (low_range[2] - low_range[1]))) if low_range[0] <= x <= low_range[2] else 0
-            
-            mu_medium = max(0, min(1, (x - medium_range[0]) / (medium_range[1] - medium_range[0]), 
-                               (medium_range[2] - x) / (medium_range[2] - medium_range[1]))) if medium_range[0] <= x <= medium_range[2] else 0
-            
-            mu_high = max(0, min(1, (x - high_range[0]) / (high_range[1] - high_range[0]), 
-                              (high_range[2] - x) / (high_range[2] - high_range[1]))) if high_range[0] <= x <= high_range[2] else 0
-            
-            mu_output = max(
-                min(mu_low, cooling_fuzzy['low']),
-                min(mu_medium, cooling_fuzzy['medium']),
-                min(mu_high, cooling_fuzzy['high'])
-            )
-            
-            numerator += x * mu_output
-            denominator += mu_output
-        
-        cooling = numerator / denominator if denominator > 0 else 50
-        
-        print(f"   Слабое: {cooling_fuzzy['low']:.2f} → диапазон 0-40%")
-        print(f"   Среднее: {cooling_fuzzy['medium']:.2f} → диапазон 30-70%")
-        print(f"   Сильное: {cooling_fuzzy['high']:.2f} → диапазон 60-100%")
+        FuzzySystem._describe_sets(FuzzySystem.COOLING, ('Слабое', 'Среднее', 'Сильное'), cooling_fuzzy, "%")
         print(f"   → Рассчитанное охлаждение: {cooling:.0f}%")
         
         return round(cooling)
@@ -286,19 +614,23 @@ class MachineParameters:
         print("=" * 60)
         
         # 1. ФАЗЗИФИКАЦИЯ - преобразование четких значений в нечеткие
-        hardness_fuzzy = FuzzySystem.fuzzify_hardness(props['hardness'])
-        strength_fuzzy = FuzzySystem.fuzzify_strength(props['tensile_strength'])
-        thermal_fuzzy = FuzzySystem.fuzzify_thermal_conductivity(props['thermal_conductivity'])
+        with profiling.stage("ml3.fuzzify"):
+            hardness_fuzzy = FuzzySystem.fuzzify_hardness(props['hardness'])
+            strength_fuzzy = FuzzySystem.fuzzify_strength(props['tensile_strength'])
+            thermal_fuzzy = FuzzySystem.fuzzify_thermal_conductivity(props['thermal_conductivity'])
         
         # 2. ПРИМЕНЕНИЕ ПРАВИЛ - нечеткий вывод
-        speed_fuzzy, feed_fuzzy, cooling_fuzzy = FuzzySystem.apply_rules(
-            hardness_fuzzy, strength_fuzzy, thermal_fuzzy
-        )
+        with profiling.stage("ml3.apply_rules"):
+            speed_fuzzy, feed_fuzzy, cooling_fuzzy = FuzzySystem.apply_rules(
+                hardness_fuzzy, strength_fuzzy, thermal_fuzzy
+            )
         
         # 3. ДЕФАЗЗИФИКАЦИЯ - преобразование нечетких значений в четкие
-        cutting_speed = FuzzySystem.defuzzify_speed(speed_fuzzy)
-        feed_rate = FuzzySystem.defuzzify_feed(feed_fuzzy)
-        cooling_flow = FuzzySystem.defuzzify_cooling(cooling_fuzzy)
+        with profiling.stage("ml3.defuzzify"):
+            cutting_speed = FuzzySystem.defuzzify_speed(speed_fuzzy)
+            feed_rate = FuzzySystem.defuzzify_feed(feed_fuzzy)
+            cooling_flow = FuzzySystem.defuzzify_cooling(cooling_fuzzy)
+        profiling.count("ml3.calculate_parameters")
         
         # Расчет мощности на основе четких значений
         spindle_power = cls._calculate_power(props, cutting_speed, feed_rate)
@@ -311,26 +643,194 @@ class MachineParameters:
             'spindle_power': spindle_power,
         }
     
+    @classmethod
+    def calculate_parameters_batch(cls, hardness, tensile_strength, thermal_conductivity):
+        """Пакетный расчет параметров для массивов свойств (тысячи заказов за вызов).
+        Результаты имеют общую форму входов: для скаляров - массивы нулевой размерности"""
+        hardness, tensile_strength, thermal_conductivity = np.broadcast_arrays(
+            np.asarray(hardness, dtype=float), tensile_strength, thermal_conductivity)
+        crisp = FuzzySystem.RULE_BASE.evaluate(FuzzySystem.RULE_BASE.stack_inputs(
+            hardness=hardness, tensile_strength=tensile_strength, thermal_conductivity=thermal_conductivity))
+        cutting_speed = np.round(crisp['cutting_speed']).reshape(hardness.shape)
+        feed_rate = np.round(crisp['feed_rate'], 3).reshape(hardness.shape)
+        cooling_flow = np.round(crisp['cooling_flow']).reshape(hardness.shape)
+        spindle_power = np.asarray(np.round(np.maximum(1.0, hardness * cutting_speed * feed_rate / 1000), 1))
+        return {
+            'cutting_speed': cutting_speed.astype(int),
+            'feed_rate': feed_rate,
+            'cooling_flow': cooling_flow.astype(int),
+            'spindle_power': spindle_power,
+        }
+    
+    @classmethod
+    def calculate_parameters_quiet(cls, material_type):
+        """Расчет параметров одного материала без вывода на экран (через пакетный путь)"""
+        props = cls.MATERIAL_PROPERTIES[material_type]
+        batch = cls.calculate_parameters_batch(
+            [props['hardness']], [props['tensile_strength']], [props['thermal_conductivity']])
+        return {'material': material_type.value,
+                **{name: values[0].item() for name, values in batch.items()}}
+    
     @classmethod
     def _calculate_power(cls, props, speed, feed):
         """Расчет мощности шпинделя"""
         power = props['hardness'] * speed * feed / 1000
         return round(max(1.0, power), 1)
 
+class ParameterCache:
+    """Постоянный кэш параметров обработки и история заданий.
+    Два уровня: LRU в памяти процесса перед SQLite в режиме WAL.
+    Ключ - свойства материала и отпечаток активной базы правил."""
+    
+    PARAMETERS = ('cutting_speed', 'feed_rate', 'cooling_flow', 'spindle_power')
+    
+    def __init__(self, path="machining.db", memory_size=256, history_batch=100):
+        self.memory_size = memory_size
+        self.history_batch = history_batch
+        self._memory = OrderedDict()
+        self._pending_jobs = []
+        self._lock = threading.Lock()
+        self.hits = self.db_hits = self.misses = 0
+        
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            # таблица прежней схемы (ключ по номеру версии) - это только кэш, пересоздается
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(parameters)")]
+            if columns and 'rulebase' not in columns:
+                self.conn.execute("DROP TABLE parameters")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS parameters (
+                    hardness REAL NOT NULL,
+                    tensile_strength REAL NOT NULL,
+                    thermal_conductivity REAL NOT NULL,
+                    rulebase TEXT NOT NULL,
+                    cutting_speed INTEGER NOT NULL,
+                    feed_rate REAL NOT NULL,
+                    cooling_flow INTEGER NOT NULL,
+                    spindle_power REAL NOT NULL,
+                    PRIMARY KEY (hardness, tensile_strength, thermal_conductivity, rulebase)
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_history (
+                    id INTEGER PRIMARY KEY,
+                    machine_id TEXT NOT NULL,
+                    material TEXT NOT NULL,
+                    loaded_at REAL NOT NULL,
+                    cutting_speed INTEGER NOT NULL,
+                    feed_rate REAL NOT NULL,
+                    cooling_flow INTEGER NOT NULL,
+                    spindle_power REAL NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS job_history_machine ON job_history (machine_id, loaded_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS job_history_material ON job_history (material, loaded_at)")
+    
+    @staticmethod
+    def key(props):
+        return (float(props['hardness']), float(props['tensile_strength']),
+                float(props['thermal_conductivity']), FuzzySystem.RULE_BASE.fingerprint)
+    
+    def get(self, props):
+        """Параметры из памяти или SQLite, None при промахе"""
+        key = self.key(props)
+        with self._lock:
+            params = self._memory.get(key)
+            if params is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(params)
+            row = self.conn.execute(
+                "SELECT cutting_speed, feed_rate, cooling_flow, spindle_power FROM parameters "
+                "WHERE hardness = ? AND tensile_strength = ? AND thermal_conductivity = ? "
+                "AND rulebase = ?", key).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            params = dict(zip(self.PARAMETERS, row))
+            self._remember(key, params)
+            return dict(params)
+    
+    def put(self, props, params):
+        key = self.key(props)
+        values = {name: params[name] for name in self.PARAMETERS}
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO parameters VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + tuple(values[name] for name in self.PARAMETERS))
+            self._remember(key, values)
+    
+    def _remember(self, key, params):
+        self._memory[key] = params
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def record_job(self, machine_id, material, params):
+        """Запись в историю заданий; пишется пакетами по history_batch"""
+        with self._lock:
+            self._pending_jobs.append((machine_id, material, time.time())
+                                      + tuple(params[name] for name in self.PARAMETERS))
+            if len(self._pending_jobs) < self.history_batch:
+                return
+        self.flush()
+    
+    def flush(self):
+        with self._lock:
+            jobs, self._pending_jobs = self._pending_jobs, []
+            if jobs:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT INTO job_history (machine_id, material, loaded_at, cutting_speed, "
+                        "feed_rate, cooling_flow, spindle_power) VALUES (?, ?, ?, ?, ?, ?, ?)", jobs)
+    
+    def jobs_for_machine(self, machine_id, limit=100):
+        self.flush()
+        return self.conn.execute(
+            "SELECT * FROM job_history WHERE machine_id = ? ORDER BY loaded_at DESC LIMIT ?",
+            (machine_id, limit)).fetchall()
+    
+    def jobs_for_material(self, material, limit=100):
+        self.flush()
+        return self.conn.execute(
+            "SELECT * FROM job_history WHERE material = ? ORDER BY loaded_at DESC LIMIT ?",
+            (material, limit)).fetchall()
+    
+    def stats(self):
+        return {'memory_hits': self.hits, 'db_hits': self.db_hits, 'misses': self.misses,
+                'memory_size': len(self._memory)}
+    
+    def close(self):
+        self.flush()
+        self.conn.close()
+
 class MachineController:
     """Управление промышленным станком"""
     
-    def __init__(self, machine_id="CNC_001"):
+    def __init__(self, machine_id="CNC_001", cache=None):
         self.machine_id = machine_id
+        self.cache = cache
         self.current_parameters = None
     
     def load_material(self, material_type):
         """Загрузка материала и расчет параметров"""
         print(f"\n СТАНОК {self.machine_id}: ЗАГРУЗКА {material_type.value}")
         
-        self.current_parameters = MachineParameters.calculate_parameters(material_type)
+        props = MachineParameters.MATERIAL_PROPERTIES[material_type]
+        cached = self.cache.get(props) if self.cache is not None else None
+        if cached is not None:
+            print(f"\n ПАРАМЕТРЫ ВЗЯТЫ ИЗ КЭША")
+            self.current_parameters = {'material': material_type.value, **cached}
+        else:
+            self.current_parameters = MachineParameters.calculate_parameters(material_type)
+            print(f"\n РАСЧЕТ ЗАВЕРШЕН!")
+            if self.cache is not None:
+                self.cache.put(props, self.current_parameters)
         
-        print(f"\n РАСЧЕТ ЗАВЕРШЕН!")
+        if self.cache is not None:
+            self.cache.record_job(self.machine_id, material_type.value, self.current_parameters)
         self._display_final_parameters()
         
         return self.current_parameters
@@ -345,6 +845,227 @@ class MachineController:
         print(f"    Охлаждение: {params['cooling_flow']}%")
         print(f"    Мощность шпинделя: {params['spindle_power']} кВт")
 
+class ControllerService:
+    """Асинхронный сервис для множества станков.
+    Запросы на загрузку материала приходят из очереди или локального сокета,
+    одинаковые одновременные запросы объединяются в один расчет,
+    вывод выполняется в пуле потоков или процессов, не блокируя цикл событий."""
+    
+    def __init__(self, machine_ids, cache=None, executor=None):
+        self.controllers = {machine_id: MachineController(machine_id, cache) for machine_id in machine_ids}
+        self.cache = cache
+        self.executor = executor or ThreadPoolExecutor()
+        self._inflight = {}
+        # ссылки на задачи ответов из очереди, чтобы их не собрал сборщик мусора
+        self._replies = set()
+        self.computed = self.coalesced = 0
+    
+    @staticmethod
+    def parse_material(name):
+        """Материал по имени перечисления (STEEL) или по значению (Сталь)"""
+        if name.upper() in MaterialProperty.__members__:
+            return MaterialProperty[name.upper()]
+        return MaterialProperty(name)
+    
+    async def load_material(self, machine_id, material_type):
+        controller = self.controllers[machine_id]
+        params = await self._parameters(material_type)
+        controller.current_parameters = dict(params)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.record_job, machine_id, material_type.value, params)
+        return controller.current_parameters
+    
+    async def _parameters(self, material_type):
+        task = self._inflight.get(material_type)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(material_type))
+            self._inflight[material_type] = task
+            task.add_done_callback(lambda _: self._inflight.pop(material_type, None))
+        else:
+            self.coalesced += 1
+        # shield: отмена одного запроса не отменяет общий расчет
+        return await asyncio.shield(task)
+    
+    async def _compute(self, material_type):
+        props = MachineParameters.MATERIAL_PROPERTIES[material_type]
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, props)
+            if cached is not None:
+                return {'material': material_type.value, **cached}
+        loop = asyncio.get_running_loop()
+        params = await loop.run_in_executor(
+            self.executor, MachineParameters.calculate_parameters_quiet, material_type)
+        self.computed += 1
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, props, params)
+        return params
+    
+    async def handle_request(self, machine_id, material_name):
+        """Один запрос → словарь-ответ (параметры или ошибка)"""
+        try:
+            material_type = self.parse_material(material_name)
+            if machine_id not in self.controllers:
+                raise ValueError(f"неизвестный станок {machine_id}")
+            params = await self.load_material(machine_id, material_type)
+            return {'machine_id': machine_id, **params}
+        except ValueError as exc:
+            return {'machine_id': machine_id, 'error': str(exc)}
+        except Exception as exc:
+            # сбой кэша или пула не должен оставлять клиента без ответа
+            return {'machine_id': machine_id, 'error': f"внутренняя ошибка: {exc!r}"}
+    
+    async def serve_queue(self, queue):
+        """Обработка запросов (machine_id, материал, future) из asyncio.Queue"""
+        while True:
+            machine_id, material_name, reply = await queue.get()
+            task = asyncio.create_task(self._reply(machine_id, material_name, reply))
+            self._replies.add(task)
+            task.add_done_callback(self._replies.discard)
+    
+    async def _reply(self, machine_id, material_name, reply):
+        try:
+            result = await self.handle_request(machine_id, material_name)
+        except BaseException:
+            if not reply.done():
+                reply.cancel()
+            raise
+        if not reply.done():
+            reply.set_result(result)
+    
+    async def _handle_connection(self, reader, writer):
+        # протокол: строка "станок материал" → строка JSON с параметрами
+        pending = set()
+        lock = asyncio.Lock()
+        
+        async def answer(machine_id, material_name):
+            result = await self.handle_request(machine_id, material_name)
+            async with lock:
+                writer.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        
+        try:
+            while line := await reader.readline():
+                parts = line.decode("utf-8").split()
+                if len(parts) != 2:
+                    continue
+                task = asyncio.create_task(answer(*parts))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+    
+    async def serve(self, host="127.0.0.1", port=8770, path=None):
+        """Сервер на TCP-порту localhost или на Unix-сокете path"""
+        if path:
+            server = await asyncio.start_unix_server(self._handle_connection, path)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+class AdaptiveControlLoop:
+    """Замкнутый контур адаптивного управления в реальном времени (симуляция).
+    На каждом такте нечеткий вывод пересчитывается по смоделированной нагрузке
+    шпинделя и температуре зоны резания. Кривые принадлежности рассчитаны заранее,
+    все буферы выделены до запуска; если все выходы считаются по центру тяжести
+    на сетке (method='centroid'), внутри цикла массивы не создаются. Методы bisector,
+    mom и analytic создают временные массивы на каждом такте.
+    Для каждого такта измеряется задержка вывода и считаются пропуски дедлайна.
+    В режиме реального времени контур спит до конца такта и только последние
+    SPIN_NS наносекунд ждет активно, чтобы не занимать ядро целиком."""
+    
+    SPIN_NS = 100_000
+    
+    def __init__(self, material_type, tick_rate=1000, deadline=1e-3, seed=0):
+        self.material_type = material_type
+        self.props = MachineParameters.MATERIAL_PROPERTIES[material_type]
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.deadline_ns = int(deadline * 1e9)
+        self.rng = np.random.default_rng(seed)
+        # Буферы вывода выделяются один раз: входы, степени термов, активации, агрегаты
+        self.rule_base = FuzzySystem.RULE_BASE
+        self._workspace = self.rule_base.workspace()
+        self._inputs = np.empty(len(self.rule_base.input_names))
+        # Положение входов и выходов контура в порядке переменных конфигурации
+        self._hardness, self._strength, self._thermal = self.rule_base.positions(
+            ('hardness', 'tensile_strength', 'thermal_conductivity'))
+        self._speed, self._feed, self._cooling = self.rule_base.positions(
+            ('cutting_speed', 'feed_rate', 'cooling_flow'), of='outputs')
+    
+    def _infer(self, hardness, strength, thermal):
+        """Вывод одного такта в заранее выделенные буферы: (скорость, подача, охлаждение)"""
+        self._inputs[self._hardness] = hardness
+        self._inputs[self._strength] = strength
+        self._inputs[self._thermal] = thermal
+        crisp = self.rule_base.infer_into(self._inputs, self._workspace)
+        return crisp[self._speed], crisp[self._feed], crisp[self._cooling]
+    
+    def run(self, n_ticks=5000, realtime=False):
+        """Прогон контура на n_ticks тактов; realtime=True выдерживает частоту тактов"""
+        hardness = self.props['hardness']
+        strength = self.props['tensile_strength']
+        thermal = self.props['thermal_conductivity']
+        # Возмущения генерируются заранее: шум нагрузки и твердое включение в середине прогона
+        noise = 1 + 0.05 * self.rng.standard_normal(n_ticks)
+        inclusion = np.ones(n_ticks)
+        inclusion[n_ticks // 3: n_ticks // 2] = 1.4
+        latency = np.empty(n_ticks, dtype=np.int64)
+        trace = {name: np.empty(n_ticks) for name in
+                 ('spindle_load', 'temperature', 'cutting_speed', 'feed_rate', 'cooling_flow')}
+        
+        speed, feed, cooling = self._infer(hardness, strength, thermal)
+        nominal_load = hardness * speed * feed / 1000
+        temperature = ambient = 20.0
+        misses = 0
+        start = next_tick = time.perf_counter_ns()
+        period_ns = int(self.dt * 1e9)
+        for k in range(n_ticks):
+            # Модель станка: нагрузка растет с подачей, скоростью и твердостью,
+            # температура - инерционное звено, охлаждение ее снижает
+            load = hardness * inclusion[k] * speed * feed / 1000 * noise[k]
+            heat = ambient + 40 * load / max(nominal_load, 1e-9) - 0.3 * cooling
+            temperature += (heat - temperature) * self.dt / 0.05
+            load_ratio = load / max(nominal_load, 1e-9)
+            
+            tick_start = time.perf_counter_ns()
+            speed, feed, cooling = self._infer(hardness * load_ratio, strength * load_ratio,
+                                               thermal * ambient / max(temperature, ambient))
+            latency[k] = time.perf_counter_ns() - tick_start
+            if latency[k] > self.deadline_ns:
+                misses += 1
+            
+            trace['spindle_load'][k] = load
+            trace['temperature'][k] = temperature
+            trace['cutting_speed'][k] = speed
+            trace['feed_rate'][k] = feed
+            trace['cooling_flow'][k] = cooling
+            if realtime:
+                next_tick += period_ns
+                remaining = next_tick - time.perf_counter_ns()
+                if remaining > self.SPIN_NS:
+                    time.sleep((remaining - self.SPIN_NS) / 1e9)
+                while time.perf_counter_ns() < next_tick:
+                    pass
+        
+        latency_us = latency / 1000
+        return {
+            'material': self.material_type.value,
+            'ticks': n_ticks,
+            'elapsed_s': (time.perf_counter_ns() - start) / 1e9,
+            'deadline_misses': misses,
+            'latency_us': {
+                'p50': float(np.percentile(latency_us, 50)),
+                'p90': float(np.percentile(latency_us, 90)),
+                'p99': float(np.percentile(latency_us, 99)),
+                'p99.9': float(np.percentile(latency_us, 99.9)),
+                'max': float(latency_us.max()),
+            },
+            'trace': trace,
+        }
+
 def main():
     """Главная функция - демонстрация работы системы"""
     print(" СИСТЕМА АВТОМАТИЗАЦИИ СТАНКОВ С НЕЧЕТКОЙ ЛОГИКОЙ")
@@ -370,4 +1091,33 @@ def main():
     print(f"\n ДЕМОНСТРАЦИЯ ЗАВЕРШЕНА!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Система автоматизации станков с нечеткой логикой")
+    parser.add_argument("--serve", action="store_true", help="запустить сервис для цеха вместо демонстрации")
+    parser.add_argument("--machines", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--socket", help="путь Unix-сокета вместо TCP-порта")
+    parser.add_argument("--db", help="файл SQLite для кэша параметров и истории")
+    parser.add_argument("--control-loop", metavar="MATERIAL", help="симуляция адаптивного контура для материала")
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--config", help="JSON с термами, выходами и правилами вместо FUZZY_CONFIG")
+    args = parser.parse_args()
+    
+    if args.config:
+        FuzzySystem.use_config(args.config)
+    
+    if args.control_loop:
+        loop = AdaptiveControlLoop(ControllerService.parse_material(args.control_loop))
+        report = loop.run(args.ticks, realtime=True)
+        print(f" КОНТУР {report['material']}: {report['ticks']} тактов за {report['elapsed_s']:.2f} с, "
+              f"пропусков дедлайна: {report['deadline_misses']}")
+        print("   Задержка вывода, мкс: " + ", ".join(f"{k}={v:.1f}" for k, v in report['latency_us'].items()))
+    elif args.serve:
+        cache = ParameterCache(args.db) if args.db else None
+        service = ControllerService([f"CNC_{i:03d}" for i in range(1, args.machines + 1)], cache)
+        try:
+            asyncio.run(service.serve(port=args.port, path=args.socket))
+        finally:
+            if cache is not None:
+                cache.close()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+Автоподбор точек излома функций принадлежности по эталонным данным обработки.
+Эталон - CSV с колонками hardness, tensile_strength, thermal_conductivity,
+cutting_speed, feed_rate, cooling_flow. Настраиваются все числовые точки
+входных термов и треугольники выходных множеств из FUZZY_CONFIG.
+Оптимизатор - дифференциальная эволюция: кандидаты оцениваются пакетно
+(вектор параметров → тензор вывода), пакеты делятся между процессами,
+уже оцененные кандидаты берутся из кэша.
+"""
+
+import argparse
+import copy
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ml3 import FUZZY_CONFIG, CompiledRuleBase
+
+INPUTS = ('hardness', 'tensile_strength', 'thermal_conductivity')
+OUTPUTS = ('cutting_speed', 'feed_rate', 'cooling_flow')
+
+
+class BreakpointLayout:
+    """Соответствие вектора параметров числовым точкам излома конфигурации"""
+
+    # минимальный зазор между соседними точками, в долях масштаба параметра
+    MIN_GAP = 1e-3
+
+    def __init__(self, config=FUZZY_CONFIG):
+        self.config = config
+        self.rule_base = CompiledRuleBase(config)
+        rb = self.rule_base
+
+        # Входные термы: (n_terms, 4), None → nan (сторона отсутствует)
+        self.input_params = np.array([[np.nan if v is None else v for v in config['inputs'][name][term]]
+                                      for name, term in rb.input_terms], dtype=float)
+        self.input_mask = ~np.isnan(self.input_params)
+        n_inputs = int(self.input_mask.sum())
+
+        # Выходные треугольники подряд по выходам: (n_out_terms, 3)
+        self.output_params = np.array([config['outputs'][name]['sets'][term] for name, term in rb.output_terms],
+                                      dtype=float)
+        self.vector = np.concatenate([self.input_params[self.input_mask], self.output_params.ravel()])
+        self.scale = np.maximum(np.abs(self.vector), 1e-2)
+
+        # Индексы пар (a, b), (c, d) и троек треугольников в векторе - для починки порядка
+        position = np.full(self.input_params.shape, -1)
+        position[self.input_mask] = np.arange(n_inputs)
+        self.pairs = [position[i, cols] for i in range(len(position)) for cols in ([0, 1], [2, 3])
+                      if (position[i, cols] >= 0).all()]
+        self.triangles = n_inputs + np.arange(self.output_params.size).reshape(-1, 3)
+        self.n_inputs = n_inputs
+        # строки эталона идут в порядке INPUTS, база правил ждет входы в порядке конфигурации
+        rb.positions(INPUTS)
+        rb.positions(OUTPUTS, of='outputs')
+        self.input_order = [INPUTS.index(name) for name in rb.input_names]
+
+    def repair(self, vectors):
+        """Упорядочить точки каждой стороны терма и каждого треугольника"""
+        vectors = np.array(vectors, dtype=float)
+        for group in list(self.pairs) + list(self.triangles):
+            values = np.sort(vectors[:, group], axis=1)
+            gap = self.MIN_GAP * self.scale[group]
+            for j in range(1, len(group)):
+                values[:, j] = np.maximum(values[:, j], values[:, j - 1] + gap[j])
+            vectors[:, group] = values
+        return vectors
+
+    def split(self, vectors):
+        """(C, P) → входные трапеции (C, n_terms, 4) и выходные треугольники (C, n_out_terms, 3)"""
+        inputs = np.broadcast_to(self.input_params, (len(vectors),) + self.input_params.shape).copy()
+        inputs[:, self.input_mask] = vectors[:, :self.n_inputs]
+        outputs = vectors[:, self.n_inputs:].reshape((len(vectors),) + self.output_params.shape)
+        return inputs, outputs
+
+    def to_config(self, vector):
+        """Конфигурация с подставленными точками излома"""
+        config = copy.deepcopy(self.config)
+        inputs, outputs = self.split(np.asarray(vector, dtype=float)[None])
+        for (name, term), params in zip(self.rule_base.input_terms, inputs[0]):
+            config['inputs'][name][term] = [None if np.isnan(v) else round(float(v), 6) for v in params]
+        for (name, term), params in zip(self.rule_base.output_terms, outputs[0]):
+            config['outputs'][name]['sets'][term] = [round(float(v), 6) for v in params]
+        # version - версия формата и не меняется; происхождение - отпечаток исходной конфигурации
+        config['tuned_from'] = self.rule_base.fingerprint
+        return config
+
+    def predict(self, vectors, inputs, chunk_size=1 << 21):
+        """Вывод для C кандидатов и M записей: (C, n_outputs, M)"""
+        rb = self.rule_base
+        vectors = np.atleast_2d(vectors)
+        inputs = np.asarray(inputs, dtype=float)
+        n_records = inputs.shape[1]
+        terms, triangles = self.split(vectors)
+        a, b, c, d = (terms[:, :, i, None] for i in range(4))
+        x = inputs[self.input_order][rb.term_input][None]
+        with np.errstate(invalid='ignore'):
+            rise = np.where(np.isnan(a), 1.0, (x - a) / (b - a))
+            fall = np.where(np.isnan(d), 1.0, (d - x) / (d - c))
+        mu = np.clip(np.minimum(np.minimum(rise, fall), 1.0), 0.0, 1.0)
+        mu = np.concatenate([mu, np.ones((len(vectors), 1, n_records))], axis=1)
+        firing = mu[:, rb.antecedents].min(axis=2)
+        activations = (rb.consequent_mask[None, :, :, None] * firing[:, None]).max(axis=2)
+
+        result = np.empty((len(vectors), len(rb.output_names), n_records))
+        for o, name in enumerate(rb.output_names):
+            # каждый выход считается тем методом дефаззификации, что выбран в конфигурации
+            defuzzifier = rb.defuzzifiers[name]
+            x_values = defuzzifier.x_values
+            tri = triangles[:, rb.output_slices[name]]
+            act = activations[:, rb.output_slices[name]]
+            if defuzzifier.method == 'analytic':
+                n_lines = 3 * act.shape[1] + 1
+                width = n_lines * (n_lines - 1) // 2 + 2
+                # активации (C, M, n_sets) и треугольники кандидата (C, 1, n_sets, 3)
+                act, tri = np.moveaxis(act, 1, -1), tri[:, None]
+            else:
+                width = len(x_values)
+                ta, tb, tc = (tri[:, :, i, None] for i in range(3))
+                curves = np.clip(np.minimum((x_values - ta) / (tb - ta), (tc - x_values) / (tc - tb)), 0, 1)
+            # по кандидатам порциями, чтобы тензор (C, n_sets, M, width) не разрастался
+            step = max(1, chunk_size // (len(defuzzifier.terms) * n_records * width))
+            for start in range(0, len(vectors), step):
+                part = slice(start, start + step)
+                if defuzzifier.method == 'analytic':
+                    result[part, o] = defuzzifier.analytic(act[part], tri[part])
+                else:
+                    aggregated = np.minimum(act[part, :, :, None], curves[part, :, None, :]).max(axis=1)
+                    result[part, o] = defuzzifier.reduce(aggregated)
+        return result
+
+
+def load_records(path):
+    """CSV эталона → входы (3, M) и целевые выходы (3, M)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    inputs = np.array([[float(row[name]) for row in rows] for name in INPUTS])
+    targets = np.array([[float(row[name]) for row in rows] for name in OUTPUTS])
+    return inputs, targets
+
+
+def loss(layout, vectors, inputs, targets):
+    """Средний квадрат ошибки, нормированной на диапазон каждого выхода: (C,)"""
+    rb = layout.rule_base
+    order = [rb.output_names.index(name) for name in OUTPUTS]
+    spans = np.array([np.ptp(rb.defuzzifiers[name].x_values) for name in OUTPUTS])
+    errors = (layout.predict(vectors, inputs)[:, order] - targets[None]) / spans[None, :, None]
+    return (errors ** 2).mean(axis=(1, 2))
+
+
+# --- Параллельная оценка: данные передаются в процесс один раз при запуске ---
+_worker = {}
+
+
+def _init_worker(config, inputs, targets):
+    _worker['layout'] = BreakpointLayout(config)
+    _worker['inputs'] = inputs
+    _worker['targets'] = targets
+
+
+def _score_chunk(vectors):
+    return loss(_worker['layout'], vectors, _worker['inputs'], _worker['targets'])
+
+
+class CandidateScorer:
+    """Оценка кандидатов пакетами в пуле процессов с кэшем уже оцененных"""
+
+    def __init__(self, layout, inputs, targets, processes=None, decimals=6):
+        self.layout = layout
+        self.inputs, self.targets = inputs, targets
+        self.decimals = decimals
+        self.cache = {}
+        self.hits = self.misses = 0
+        self.workers = processes or os.cpu_count() or 1
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(layout.config, inputs, targets))
+
+    def __call__(self, vectors):
+        keys = [np.round(v, self.decimals).tobytes() for v in vectors]
+        scores = np.empty(len(vectors))
+        todo = {}
+        for i, key in enumerate(keys):
+            if key in self.cache:
+                scores[i] = self.cache[key]
+                self.hits += 1
+            elif key in todo:
+                todo[key].append(i)
+                self.hits += 1
+            else:
+                todo[key] = [i]
+                self.misses += 1
+        if todo:
+            rows = np.array([indices[0] for indices in todo.values()])
+            batch = vectors[rows]
+            if self.pool is None:
+                computed = loss(self.layout, batch, self.inputs, self.targets)
+            else:
+                chunks = np.array_split(batch, min(len(batch), self.workers * 4))
+                computed = np.concatenate(list(self.pool.map(_score_chunk, chunks)))
+            for (key, indices), value in zip(todo.items(), computed):
+                self.cache[key] = value
+                scores[indices] = value
+        return scores
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def tune(inputs, targets, config=FUZZY_CONFIG, population=64, generations=100,
+         spread=0.2, mutation=0.6, crossover=0.9, seed=0, processes=None):
+    """Дифференциальная эволюция (rand/1/bin) над точками излома.
+    Возвращает настроенную конфигурацию, историю лучшей ошибки и статистику кэша."""
+    rng = np.random.default_rng(seed)
+    layout = BreakpointLayout(config)
+    scorer = CandidateScorer(layout, inputs, targets, processes)
+    try:
+        n_params = len(layout.vector)
+        pop = layout.vector + rng.normal(0, spread, (population, n_params)) * layout.scale
+        pop[0] = layout.vector
+        pop = layout.repair(pop)
+        scores = scorer(pop)
+        history = [scores.min()]
+        for _ in range(generations):
+            # три различных донора, отличных от текущей особи
+            order = np.argsort(rng.random((population, population)) + np.eye(population), axis=1)
+            a, b, c = order[:, 0], order[:, 1], order[:, 2]
+            mutant = pop[a] + mutation * (pop[b] - pop[c])
+            cross = rng.random((population, n_params)) < crossover
+            cross[np.arange(population), rng.integers(0, n_params, population)] = True
+            trial = layout.repair(np.where(cross, mutant, pop))
+            trial_scores = scorer(trial)
+            better = trial_scores <= scores
+            pop[better], scores[better] = trial[better], trial_scores[better]
+            history.append(scores.min())
+        best = int(np.argmin(scores))
+        return {
+            'config': layout.to_config(pop[best]),
+            'loss': float(scores[best]),
+            'history': [float(v) for v in history],
+            'cache': {'hits': scorer.hits, 'misses': scorer.misses, 'size': len(scorer.cache)},
+        }
+    finally:
+        scorer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Подбор функций принадлежности по эталонным данным")
+    parser.add_argument("data", help="CSV: hardness,tensile_strength,thermal_conductivity,"
+                                     "cutting_speed,feed_rate,cooling_flow")
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tuned_config.json")
+    args = parser.parse_args(argv)
+
+    inputs, targets = load_records(args.data)
+    result = tune(inputs, targets, population=args.population, generations=args.generations,
+                  seed=args.seed, processes=args.processes)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result['config'], f, ensure_ascii=False, indent=2)
+    print(f" Ошибка: {result['history'][0]:.5f} → {result['loss']:.5f}, кэш: {result['cache']}")
+    print(f" Конфигурация записана в {args.out} (использовать: python ml3.py --config {args.out})")
+
+
+if __name__ == "__main__":
+    main()
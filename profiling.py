@@ -0,0 +1,182 @@
+"""
+Легковесная опциональная инструментация горячих участков ml1, ml2 и ml3.
+
+Включается переменной окружения AI_PROFILE=1 (до импорта модулей лабораторных)
+или вызовом enable() - последний действует на stage() и count(), но не на функции,
+уже обернутые timed(). Выключенная инструментация не оборачивает функции вовсе,
+stage() и count() стоят одну проверку флага. Для каждого этапа
+собираются число вызовов, суммарное время и гистограмма задержек;
+выгрузка - JSON или текстовый формат Prometheus. Если задана переменная
+AI_PROFILE_OUT, статистика записывается в этот файл при выходе из процесса
+(формат по расширению: .json или .prom).
+
+Модули лабораторных импортируют этот файл как обычный модуль profiling, поэтому
+корень репозитория должен быть в sys.path, например:
+    PYTHONPATH=. AI_PROFILE=1 AI_PROFILE_OUT=ml1.prom python ml1/benchmark.py
+Если модуль не найден, лабораторные подставляют заглушку с теми же функциями,
+которые ничего не делают, и работают без инструментации.
+"""
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# Границы корзин гистограммы, секунды: 1 мкс ... 10 с
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+_enabled = os.environ.get("AI_PROFILE", "") not in ("", "0")
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def record(name, seconds):
+    """Учесть один замер длительности этапа name"""
+    with _lock:
+        stage = _stages.get(name)
+        if stage is None:
+            stage = _stages[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(BUCKETS) + 1)}
+        stage["count"] += 1
+        stage["sum"] += seconds
+        stage["max"] = max(stage["max"], seconds)
+        stage["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+def count(name, n=1):
+    """Увеличить счетчик name"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def timed(name):
+    """Декоратор: время и число вызовов функции как этап name.
+    Применяется при импорте: если профилирование в этот момент выключено,
+    функция возвращается без обертки и не теряет ни такта (включать через
+    AI_PROFILE до импорта; enable() позже включает только stage() и count())"""
+    def decorate(fn):
+        if not _enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """Контекстный менеджер: время блока как этап name"""
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+
+def snapshot():
+    """Текущая статистика: этапы (с гистограммой) и счетчики"""
+    with _lock:
+        stages = {
+            name: {
+                "count": s["count"],
+                "sum_seconds": s["sum"],
+                "mean_seconds": s["sum"] / s["count"],
+                "max_seconds": s["max"],
+                "buckets": {**{f"{bound:g}": n for bound, n in zip(BUCKETS, s["buckets"])},
+                            "+Inf": s["buckets"][-1]},
+            }
+            for name, s in _stages.items()
+        }
+        return {"stages": stages, "counters": dict(_counters)}
+
+
+def to_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def to_prometheus(path):
+    """Гистограммы этапов и счетчики в текстовом формате Prometheus"""
+    lines = ["# HELP ai_stage_seconds Stage latency.", "# TYPE ai_stage_seconds histogram"]
+    with _lock:
+        for name, s in sorted(_stages.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, s["buckets"]):
+                cumulative += n
+                lines.append(f'ai_stage_seconds_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'ai_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+            lines.append(f'ai_stage_seconds_sum{{stage="{name}"}} {s["sum"]:.9f}')
+            lines.append(f'ai_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        lines += ["# HELP ai_events_total Event counters.", "# TYPE ai_events_total counter"]
+        for name, n in sorted(_counters.items()):
+            lines.append(f'ai_events_total{{name="{name}"}} {n}')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def export(path):
+    """Выгрузка по расширению файла: .prom - Prometheus, иначе JSON"""
+    (to_prometheus if path.endswith(".prom") else to_json)(path)
+
+
+def _export_at_exit():
+    path = os.environ.get("AI_PROFILE_OUT")
+    if path and (_stages or _counters):
+        export(f"{path}.{os.getpid()}" if os.environ.get("AI_PROFILE_PER_PROCESS") else path)
+
+
+atexit.register(_export_at_exit)